@@ -12,6 +12,7 @@ class User(AbstractUser):
     year_of_birth = models.PositiveIntegerField(null=True, blank=True)
     level = models.IntegerField(default=1, null=True, blank=True)
     phone = models.CharField(max_length=15, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.username
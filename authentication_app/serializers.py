@@ -13,9 +13,12 @@ class UserSerializer(ModelSerializer):
         fields = ['id','username', 'email', 'first_name', 'last_name', 'gender', 'year_of_birth','phone']
 
     def update(self, instance, validated_data):
-        user = User.objects.filter(pk=instance.pk)
-        user.update(**validated_data)
-        return user.first()
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # save() rather than QuerySet.update: it stamps updated_at, which the
+        # coaching ETags read, and sends the signals that retire cached copies
+        instance.save()
+        return instance
 
 
         
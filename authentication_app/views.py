@@ -10,6 +10,7 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from .models import *
+from backend.conditional import ConditionalGetMixin
 
 
 User = get_user_model()
@@ -82,8 +83,10 @@ class LoginView(APIView):
             return Response({"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED)
     
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = UserSerializer
+    etag_namespace = 'user'
+    etag_user_scoped = True
 
 
     def get_queryset(self):
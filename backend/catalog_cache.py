@@ -0,0 +1,87 @@
+"""
+Read-through cache for catalog viewsets.
+
+Catalog data (content that admins edit and every user reads the same way)
+is cached as serialized ``list`` and ``retrieve`` payloads. Keys carry the
+global catalog version, kept in the version store that all workers share,
+so one ``invalidate_catalog()`` on any catalog write retires every cached
+payload in every worker at once; old entries simply age out.
+Writes that skip model signals (``bulk_create``, ``QuerySet.update``, raw
+SQL) must call it themselves.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .versioning import get_version, invalidate
+
+NAMESPACE = 'catalog'
+METRICS = ('hits', 'misses')
+
+
+def catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def catalog_version():
+    return get_version(NAMESPACE)
+
+
+def invalidate_catalog():
+    invalidate(NAMESPACE)
+
+
+def _count(metric):
+    cache = catalog_cache()
+    key = f"catalog:metrics:{metric}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def catalog_metrics():
+    values = catalog_cache().get_many([f"catalog:metrics:{metric}" for metric in METRICS])
+    metrics = {metric: values.get(f"catalog:metrics:{metric}", 0) for metric in METRICS}
+    lookups = metrics['hits'] + metrics['misses']
+    metrics['hit_ratio'] = round(metrics['hits'] / lookups, 4) if lookups else None
+    metrics['version'] = catalog_version()
+    return metrics
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the catalog cache. Only for viewsets
+    whose responses depend on nothing but the URL and the catalog tables.
+    Combined with ``ConditionalGetMixin`` (listed first), the catalog version
+    is also the ETag validator.
+    """
+    catalog_cache_timeout = None
+    etag_namespace = NAMESPACE
+
+    def catalog_cache_key(self, request):
+        url = hashlib.sha256(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        return f"catalog:{catalog_version()}:{self.basename}:{self.action}:{url}"
+
+    def cached_response(self, request, view, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.catalog_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            return Response(data)
+        _count('misses')
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.catalog_cache_timeout or settings.CATALOG_CACHE_TTL
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
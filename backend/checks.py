@@ -0,0 +1,36 @@
+"""
+System checks for deployments with several worker processes.
+
+With ``WEB_CONCURRENCY`` above 1 every worker has its own LocMemCache, so
+state the workers must share cannot be kept in one.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def is_per_process(alias):
+    return settings.CACHES[alias]['BACKEND'] == LOCMEM
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    if settings.WEB_CONCURRENCY <= 1:
+        return []
+    messages = []
+    if is_per_process(settings.VERSION_CACHE_ALIAS):
+        messages.append(Error(
+            'The version store is per process: a write in one worker leaves the cached data '
+            'and ETags of the others stale.',
+            hint='Set VERSIONS_CACHE_BACKEND to file or redis.',
+            id='backend.E001',
+        ))
+    if is_per_process(settings.LLM_CACHE_ALIAS):
+        messages.append(Warning(
+            'The LLM cache is per process: workers each ask upstream for the same answer and '
+            'LLM_GLOBAL_CONCURRENCY is enforced per worker.',
+            hint='Set LLM_CACHE_BACKEND to file or redis.',
+            id='backend.W001',
+        ))
+    return messages
@@ -0,0 +1,101 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF viewsets.
+
+``ConditionalGetMixin`` works out a validator for ``list`` and ``retrieve``
+before the handler runs, and answers ``304 Not Modified`` when the client
+already has the current representation, so nothing is serialized or
+rendered. The validator comes from one of:
+
+- a data version (``etag_namespace``, see ``backend.versioning``) that is
+  bumped on every write to the rows the view can return. With
+  ``etag_user_scoped`` the requesting user's version and the shared
+  (unscoped) one are combined, so rows without an owner are covered too.
+  ``etag_embeds_user`` adds the version of the user's own record, for
+  payloads that show the user (their username, say);
+- ``etag_updated_field``, a timestamp column: its maximum plus the row
+  count over the same filtered queryset the view would serve, as one
+  aggregate query. This one also sends ``Last-Modified`` on detail routes.
+  When the payload embeds related rows, give a tuple that also names their
+  timestamps (e.g. ``'user__updated_at'``); the newest of them counts.
+
+The ETag also covers the full URL, the user and the negotiated renderer,
+so pages, ``?fields=`` and formats never share a validator.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .versioning import get_version
+
+
+class ConditionalGetMixin:
+    # The etag_* attributes are read with getattr so that other mixins later
+    # in the MRO (e.g. CatalogCacheMixin) can provide them.
+
+    def get_etag_version(self):
+        namespace = getattr(self, 'etag_namespace', None)
+        if namespace is None:
+            return None
+        if not getattr(self, 'etag_user_scoped', False):
+            version = get_version(namespace)
+        else:
+            version = f"{get_version(namespace, self.request.user.pk)}.{get_version(namespace)}"
+        if getattr(self, 'etag_embeds_user', False):
+            version = f"{version}.{get_version('user', self.request.user.pk)}"
+        return version
+
+    def get_validators(self):
+        """``(etag source, last modified)``, or ``(None, None)`` when the view has no validator."""
+        version = self.get_etag_version()
+        if version is not None:
+            return str(version), None
+
+        field = getattr(self, 'etag_updated_field', None)
+        if field is None:
+            return None, None
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        if isinstance(field, (tuple, list)):
+            field = Greatest(*field) if len(field) > 1 else field[0]
+        latest = queryset.order_by().aggregate(latest=Max(field), count=Count('pk'))
+        if latest['latest'] is None:
+            return f"empty.{latest['count']}", None
+        last_modified = latest['latest'] if self.action == 'retrieve' else None
+        return f"{latest['latest'].isoformat()}.{latest['count']}", last_modified
+
+    def compute_etag(self, request, source):
+        renderer = getattr(request, 'accepted_media_type', '')
+        key = f"{self.basename}:{self.action}:{request.user.pk}:{renderer}:{request.get_full_path()}:{source}"
+        return quote_etag(hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+
+    def conditional_response(self, request, view, *args, **kwargs):
+        source, last_modified = self.get_validators()
+        if source is None:
+            return view(request, *args, **kwargs)
+        etag = self.compute_etag(request, source)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        else:
+            response = not_modified
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Let clients keep the body but always check back before using it
+        response.setdefault('Cache-Control', 'private, no-cache')
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
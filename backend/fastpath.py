@@ -0,0 +1,247 @@
+"""
+Fast path for read-only list actions.
+
+``FastListMixin`` serves ``list`` from ``values()`` rows instead of model
+instances: the viewset's serializer is compiled once (per class and
+``?fields=`` selection) into the columns it reads and one extractor per
+field, and each row becomes a dict without building instances or walking
+the serializer tree. The output is the same as the serializer's.
+
+The compiler understands concrete model fields (also through forward
+relations, e.g. ``source='coach.user.email'``), ``get_<field>_display``
+sources, ``PrimaryKeyRelatedField`` and nested serializers. Anything else
+(``SerializerMethodField``, ``StringRelatedField``, custom sources) must
+be mirrored in the serializer's ``fast_fields``::
+
+    fast_fields = {'day_of_week': (['date'], lambda date: date.strftime('%A'))}
+
+mapping a field name to the columns it needs and a function of their
+values (which may be None). A serializer that overrides
+``to_representation`` must declare ``fast_fields`` (possibly empty) to
+confirm the override is covered. Serializers whose fields depend on the
+request, other than through ``?fields=``, cannot use the fast path.
+"""
+import datetime
+import functools
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldsets import SparseFieldsetMixin, requested_fields, restrict_fields
+
+_DISPLAY = re.compile(r'^get_(\w+)_display$')
+
+# Representations that reduce to a builtin for the values the database returns
+_BUILTIN_REPRESENTATIONS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+}
+
+
+class CompiledSerializer:
+
+    def __init__(self, columns, build, prepare):
+        self.columns = columns
+        self.build = build
+        self.prepare = prepare
+
+    def __call__(self, rows):
+        for prepare in self.prepare:
+            prepare()
+        build = self.build
+        return [build(row) for row in rows]
+
+
+def _model_path(model, attrs, where):
+    """
+    The ``values()`` lookup for a dotted source on ``model``, and the model
+    field it ends on. Intermediate relations must be non-null forward ones:
+    DRF skips the field when one is missing, which a lookup cannot express.
+    """
+    path = []
+    for attr in attrs[:-1]:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f'{where}: {attr!r} is not a model field, add it to fast_fields')
+        if not (field.many_to_one or field.one_to_one) or field.auto_created or field.null:
+            raise ImproperlyConfigured(f'{where}: {attr!r} is not a required forward relation, add it to fast_fields')
+        path.append(attr)
+        model = field.related_model
+    try:
+        field = model._meta.get_field(attrs[-1])
+    except FieldDoesNotExist:
+        raise ImproperlyConfigured(f'{where}: {attrs[-1]!r} is not a model field, add it to fast_fields')
+    if not field.concrete or field.many_to_many:
+        raise ImproperlyConfigured(f'{where}: {attrs[-1]!r} is not a column, add it to fast_fields')
+    path.append(attrs[-1])
+    return '__'.join(path), field
+
+
+def _identity(value):
+    return value
+
+
+def _plain(key, represent):
+    def get(row):
+        value = row[key]
+        return None if value is None else represent(value)
+    return get
+
+
+def _nested(key, build):
+    def get(row):
+        return None if row[key] is None else build(row)
+    return get
+
+
+def _override(keys, function):
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda row: function(row[key])
+    return lambda row: function(*[row[key] for key in keys])
+
+
+def _datetime(field, prepare):
+    """
+    ``DateTimeField.to_representation`` with the timezone and format looked
+    up once per call instead of once per value. Naive values, custom formats
+    and a disabled timezone keep the field's own method.
+    """
+    state = {}
+
+    def resolve():
+        state['timezone'] = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        state['iso'] = getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601
+    prepare.append(resolve)
+
+    def represent(value):
+        zone = state['timezone']
+        if not state['iso'] or zone is None or type(value) is not datetime.datetime or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(zone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return represent
+
+
+def _date(field, prepare):
+    """``DateField.to_representation`` with the format looked up once per call."""
+    state = {}
+
+    def resolve():
+        state['iso'] = getattr(field, 'format', api_settings.DATE_FORMAT) == ISO_8601
+    prepare.append(resolve)
+
+    def represent(value):
+        if state['iso'] and type(value) is datetime.date:
+            return value.isoformat()
+        return field.to_representation(value)
+    return represent
+
+
+def _display(choices, represent):
+    def get(value):
+        return represent(choices.get(value, value))
+    return get
+
+
+def _compile(serializer, model, prefix='', prepare=None):
+    where = type(serializer).__name__
+    overrides = getattr(serializer, 'fast_fields', None)
+    if overrides is None:
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise ImproperlyConfigured(f'{where} overrides to_representation, declare fast_fields')
+        overrides = {}
+
+    columns, getters = [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        name = field.field_name
+        if name in overrides:
+            lookups, function = overrides[name]
+            keys = [prefix + lookup for lookup in lookups]
+            columns += keys
+            getters.append((name, _override(keys, function)))
+            continue
+
+        if field.source == '*':
+            raise ImproperlyConfigured(f'{where}.{name}: source="*" is not supported, add it to fast_fields')
+        attrs = field.source_attrs
+        match = _DISPLAY.match(attrs[-1])
+        if match:
+            attrs = attrs[:-1] + [match.group(1)]
+        path, model_field = _model_path(model, attrs, f'{where}.{name}')
+        key = prefix + path
+
+        if isinstance(field, serializers.BaseSerializer):
+            if isinstance(field, serializers.ListSerializer):
+                raise ImproperlyConfigured(f'{where}.{name}: many=True is not supported, add it to fast_fields')
+            nested_columns, build = _compile(field, model_field.related_model, key + '__', prepare)
+            columns += [key] + nested_columns
+            getters.append((name, _nested(key, build)))
+            continue
+
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                raise ImproperlyConfigured(f'{where}.{name}: {type(field).__name__} is not supported, add it to fast_fields')
+            represent = _identity  # values() already returns the key
+        elif isinstance(field, (serializers.SerializerMethodField, serializers.ManyRelatedField)):
+            raise ImproperlyConfigured(f'{where}.{name}: {type(field).__name__} is not supported, add it to fast_fields')
+        elif type(field).to_representation is serializers.DateTimeField.to_representation:
+            represent = _datetime(field, prepare)
+        elif type(field).to_representation is serializers.DateField.to_representation:
+            represent = _date(field, prepare)
+        else:
+            represent = _BUILTIN_REPRESENTATIONS.get(type(field).to_representation, field.to_representation)
+        if match:
+            represent = _display(dict(model_field.flatchoices), represent)
+        columns.append(key)
+        getters.append((name, _plain(key, represent)))
+
+    def build(row):
+        return {name: get(row) for name, get in getters}
+    return columns, build
+
+
+@functools.lru_cache(maxsize=128)
+def compile_serializer(serializer_class, fields=None):
+    """Compile ``serializer_class``, restricted to ``fields`` (a frozenset) if given."""
+    serializer = serializer_class()
+    if fields is not None:
+        restrict_fields(serializer.fields, fields - set(getattr(serializer, 'extra_fields', ())))
+    prepare = []
+    columns, build = _compile(serializer, serializer_class.Meta.model, prepare=prepare)
+    return CompiledSerializer(tuple(dict.fromkeys(columns)), build, prepare)
+
+
+class FastListMixin:
+    """
+    Serve ``list`` through ``compile_serializer``. Disabled everywhere with
+    ``FAST_LIST_SERIALIZATION = False``, or per request by ``use_fast_list``.
+    """
+
+    def use_fast_list(self):
+        return settings.FAST_LIST_SERIALIZATION
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if not self.use_fast_list():
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        serializer_class = self.get_serializer_class()
+        fields = requested_fields(request) if issubclass(serializer_class, SparseFieldsetMixin) else None
+        compiled = compile_serializer(serializer_class, frozenset(fields) if fields else None)
+        ordering = [field.lstrip('-') for field in getattr(self, 'ordering', None) or ()]
+        rows = queryset.values(*dict.fromkeys(compiled.columns + tuple(ordering)))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled(page))
+        return Response(compiled(rows))
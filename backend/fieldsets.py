@@ -0,0 +1,65 @@
+"""
+Slim list representations and ``?fields=`` sparse fieldsets.
+
+``SparseFieldsetMixin`` goes on a serializer and drops every field the client
+did not ask for in ``?fields=id,title`` on read requests. ``ListFieldsetMixin``
+goes on a viewset: the ``list`` action uses ``list_serializer_class`` and
+loads only ``list_only_fields`` (narrowed further by ``?fields=``), while the
+other actions keep the full serializer.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_fields(request):
+    """The set of field names in ``?fields=``, or None when the client did not restrict them."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+def restrict_fields(fields, requested):
+    """Drop every field of a serializer's ``fields`` not in ``requested``."""
+    unknown = requested - set(fields)
+    if unknown:
+        raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+    for name in set(fields) - requested:
+        fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    # Keys that to_representation adds besides the declared fields; clients
+    # may name them in ?fields= too, and check them with wants_field()
+    extra_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = requested_fields(self.context.get('request'))
+        if self.requested_fields is not None:
+            restrict_fields(self.fields, self.requested_fields - set(self.extra_fields))
+
+    def wants_field(self, name):
+        return self.requested_fields is None or name in self.requested_fields
+
+
+class ListFieldsetMixin:
+    list_serializer_class = None
+    list_only_fields = ()
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def slim_queryset(self, queryset):
+        """Restrict a list queryset to the columns its serializer will read."""
+        if self.action != 'list' or not self.list_only_fields:
+            return queryset
+        columns = self.list_only_fields
+        requested = requested_fields(self.request)
+        if requested is not None:
+            columns = [column for column in columns if column in requested] or ['pk']
+        return queryset.select_related(None).only(*columns)
@@ -127,6 +127,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson-backed, falling back to the stdlib (see backend/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'backend.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -190,4 +200,112 @@ if not DEBUG:
     }
 
 # open API configuration
-OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', None)
\ No newline at end of file
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', None)
+# Point at a local OpenAI-compatible server (e.g. a stub in tests)
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', None)
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4o-mini')
+
+# Upstream calls go through prajnayana_dashboard.llm_gateway. LLM_TIMEOUT bounds
+# one attempt and LLM_DEADLINE the whole call including retries; requests wait
+# at most LLM_QUEUE_TIMEOUT for one of LLM_MAX_CONCURRENCY per-process or
+# LLM_GLOBAL_CONCURRENCY cluster-wide slots (the latter is per process while
+# the LLM cache is LocMemCache). After LLM_BREAKER_THRESHOLD failed calls in a
+# row, calls fail fast for LLM_BREAKER_COOLDOWN seconds.
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30))
+LLM_DEADLINE = float(os.environ.get('LLM_DEADLINE', 60))
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+LLM_RETRY_BACKOFF = float(os.environ.get('LLM_RETRY_BACKOFF', 0.5))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+LLM_GLOBAL_CONCURRENCY = int(os.environ.get('LLM_GLOBAL_CONCURRENCY', 32))
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', 2))
+LLM_BREAKER_THRESHOLD = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))
+LLM_BREAKER_COOLDOWN = float(os.environ.get('LLM_BREAKER_COOLDOWN', 30))
+
+# Worker processes serving the app (gunicorn reads the same variable). State
+# that every worker must see cannot live in a locmem cache when this is > 1.
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Stores for the caches below, picked per cache with <NAME>_CACHE_BACKEND=
+# locmem|file|redis and <NAME>_CACHE_LOCATION. locmem is private to each
+# process, file is shared by the processes of one host, redis by all hosts
+# (it needs the redis package). Each cache gets its own redis database,
+# since clearing a redis cache flushes the whole database.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', '{name}'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/var/tmp/prajnayana-{name}-cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/{db}'),
+}
+
+
+def cache_store(name, default, db):
+    """BACKEND and LOCATION of the ``name`` cache, from its environment variables."""
+    backend, location = CACHE_BACKENDS[os.environ.get(f'{name.upper()}_CACHE_BACKEND', default)]
+    return {
+        'BACKEND': backend,
+        'LOCATION': os.environ.get(f'{name.upper()}_CACHE_LOCATION', location.format(name=name, db=db)),
+    }
+
+
+# Identical article questions are answered from this cache. LocMemCache evicts
+# least recently used entries past MAX_ENTRIES; on Redis use an allkeys-lru
+# maxmemory policy for the same effect. The locks that stop several workers
+# asking upstream the same question at once, and the cluster-wide LLM slots,
+# live in it too: with locmem they only hold within one process, so set
+# LLM_CACHE_BACKEND to file or redis when WEB_CONCURRENCY > 1.
+LLM_CACHE_ALIAS = 'llm'
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 60 * 60 * 24))
+# Estimated tokens of chat history sent with each article chat question;
+# older turns are folded into a summary.
+LLM_CHAT_HISTORY_TOKENS = int(os.environ.get('LLM_CHAT_HISTORY_TOKENS', 2000))
+
+# Offline article insights (see prajnayana_dashboard/insights.py). Set the
+# provider to prajnayana_dashboard.insights.LocalInsightProvider to generate
+# them without the LLM.
+ARTICLE_INSIGHT_PROVIDER = os.environ.get('ARTICLE_INSIGHT_PROVIDER', 'prajnayana_dashboard.insights.LLMInsightProvider')
+ARTICLE_INSIGHT_WORKERS = int(os.environ.get('ARTICLE_INSIGHT_WORKERS', 2))
+ARTICLE_INSIGHTS_ON_SAVE = os.environ.get('ARTICLE_INSIGHTS_ON_SAVE', 'False') == 'True'
+
+# Data versions (see backend/versioning.py): every cache key and ETag derived
+# from user or catalog data carries one, and a write anywhere bumps it. They
+# must be seen by every worker, so with WEB_CONCURRENCY > 1 they default to the
+# file store; use redis when the workers run on several hosts. A per-process
+# version store with several workers fails the backend.E001 system check.
+VERSION_CACHE_ALIAS = 'versions'
+
+# Serialized catalog payloads (discovery questions, knowledge hubs, articles,
+# books), keyed by the catalog version that every catalog write bumps. Pick the
+# store with CATALOG_CACHE_BACKEND and CATALOG_CACHE_LOCATION (see
+# CACHE_BACKENDS). The version lives in the version store, so per-process
+# locmem payloads are retired in every worker by a write in any of them.
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60 * 60))
+
+CACHES = {
+    # Per process. What it holds (mood reports, tag facets, dashboard sections)
+    # is keyed by data versions from the shared version store.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    LLM_CACHE_ALIAS: {
+        **cache_store('llm', 'locmem', db=2),
+        'TIMEOUT': LLM_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 5000))},
+    },
+    CATALOG_CACHE_ALIAS: {
+        **cache_store('catalog', 'locmem', db=1),
+        'TIMEOUT': CATALOG_CACHE_TTL,
+    },
+    VERSION_CACHE_ALIAS: {
+        **cache_store('versions', 'file' if WEB_CONCURRENCY > 1 else 'locmem', db=3),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('VERSION_CACHE_MAX_ENTRIES', 100000))},
+    },
+}
+
+# List actions of the hot viewsets build their rows from values() instead of
+# running the serializer per instance (see backend/fastpath.py).
+FAST_LIST_SERIALIZATION = os.environ.get('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
+# Sections of /api/dashboard/home/ are keyed by data versions, so every write
+# retires them; the TTL only lets sections nobody reads again age out.
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60 * 10))
@@ -0,0 +1,196 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+
+class QueryBudgetTestCase(APITestCase):
+    """
+    Base class for endpoint query-count tests.
+
+    ``assertQueryBudget`` hits an endpoint at several table sizes and fails if
+    the number of queries grows with the rows returned (an N+1 regression) or
+    goes over the budget given for the endpoint.
+
+    Set ``self.user`` in ``setUp``; every request is authenticated as a fresh
+    copy of it so per-request lookups are not hidden by the instance cache.
+    Caches are cleared before each request, so the budget is for a miss.
+    """
+    sizes = (2, 15)
+    user = None
+
+    def assertQueryBudget(self, url, budget, make_rows, sizes=None):
+        """
+        ``make_rows(n)`` must add ``n`` more rows visible at ``url``; it is
+        called so the endpoint sees each of ``sizes`` rows in turn.
+        """
+        counts = []
+        created = 0
+        for size in sizes or self.sizes:
+            make_rows(size - created)
+            created = size
+            if self.user is not None:
+                self.client.force_authenticate(type(self.user).objects.get(pk=self.user.pk))
+            for cache in caches.all():
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            counts.append(len(context.captured_queries))
+            if len(counts) > 1 and counts[-1] != counts[0]:
+                queries = '\n'.join(query['sql'] for query in context.captured_queries)
+                self.fail(
+                    f'{url} ran {counts[0]} queries for {(sizes or self.sizes)[0]} rows but '
+                    f'{counts[-1]} for {size} rows:\n{queries}'
+                )
+        self.assertLessEqual(
+            counts[0], budget,
+            f'{url} ran {counts[0]} queries, the budget is {budget}',
+        )
+        return counts[0]
+
+
+class IndexUsageTestCase(APITestCase):
+    """
+    Base class for query plan tests: ``assertIndexed`` runs ``EXPLAIN`` and
+    fails if the query reads a whole table instead of seeking an index.
+
+    On PostgreSQL sequential scans are disabled for the test transaction, so
+    a ``Seq Scan`` in the plan means no index can serve the query at all,
+    whatever the table size. On SQLite any ``SCAN`` of a table (also a full
+    walk of an index) fails. Other databases are skipped.
+    """
+
+    def viewset_queryset(self, viewset, user, params=None, action='list'):
+        """The queryset ``viewset`` would serve to ``user`` for a GET with ``params``."""
+        request = Request(APIRequestFactory().get('/', params or {}))
+        request.user = user
+        view = viewset(request=request, action=action, args=(), kwargs={}, format_kwarg=None)
+        return view.filter_queryset(view.get_queryset())
+
+    def assertIndexed(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+            self.assertNotIn('Seq Scan', plan, f'{queryset.query}\n{plan}')
+        elif connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            self.assertIsNone(re.search(r'\bSCAN \w+', plan), f'{queryset.query}\n{plan}')
+        else:
+            self.skipTest(f'No plan check for {connection.vendor}')
+        return plan
+
+
+class FakeOpenAIServer:
+    """
+    A local stand-in for the OpenAI chat completions API.
+
+    ``reply`` builds the answer from the request body, ``delay`` slows every
+    response down and ``requests`` records the bodies that were received.
+    Every response fails with ``status`` if it is not 200, and the next
+    ``failures`` responses fail with a 500.
+    Requests with ``stream`` set are answered word by word as SSE chunks.
+    Point ``OPENAI_BASE_URL`` at ``base_url``.
+    """
+
+    def __init__(self, reply=None, delay=0):
+        self.reply = reply or (lambda body: f"answer to: {body['messages'][-1]['content']}")
+        self.delay = delay
+        self.requests = []
+        self.status = 200
+        self.failures = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                server.requests.append(body)
+                time.sleep(server.delay)
+                status = server.status
+                if server.failures:
+                    server.failures -= 1
+                    status = 500
+                if status != 200:
+                    payload = {"error": {"message": "upstream failure", "type": "server_error"}}
+                elif body.get('stream'):
+                    return self.stream(body)
+                else:
+                    payload = server.completion(body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                for piece in server.pieces(server.reply(body)):
+                    chunk = server.chunk(body, {"content": piece})
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up, e.g. on a deadline
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+
+    def completion(self, body):
+        return {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "test"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply(body)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    @staticmethod
+    def pieces(text):
+        words = text.split(' ')
+        return [word if i == 0 else f' {word}' for i, word in enumerate(words)]
+
+    def chunk(self, body, delta):
+        return {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "test"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,70 @@
+"""
+Data versions kept in the Django cache.
+
+A version changes on every write to the data it covers, so cache keys and
+validators built from it are invalidated in O(1) by bumping it instead of
+hunting down every derived key. Each bump stores a fresh random value rather
+than incrementing, so concurrent bumps cannot collapse into one on stores
+without an atomic incr (the file cache), and a version that was evicted comes
+back as a never-used value rather than restarting from an old one.
+
+Versions live in the ``VERSION_CACHE_ALIAS`` cache, which every worker
+shares. Entries keyed by a version can then sit in a per-process cache: a
+write in any worker bumps the shared version, so the keys every worker looks
+up change with it.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _key(namespace, scope):
+    return f'version:{namespace}' if scope is None else f'version:{namespace}:{scope}'
+
+
+def _store():
+    return caches[settings.VERSION_CACHE_ALIAS]
+
+
+def _new_version():
+    return secrets.token_hex(8)
+
+
+def get_version(namespace, scope=None):
+    cache = _store()
+    key = _key(namespace, scope)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(keys):
+    """``get_version`` for many ``(namespace, scope)`` pairs, in one cache round trip when all exist."""
+    stored = _store().get_many([_key(namespace, scope) for namespace, scope in keys])
+    return [
+        stored.get(_key(namespace, scope)) or get_version(namespace, scope)
+        for namespace, scope in keys
+    ]
+
+
+def bump_version(namespace, scope=None):
+    version = _new_version()
+    _store().set(_key(namespace, scope), version, timeout=None)
+    return version
+
+
+def invalidate(namespace, scope=None):
+    """
+    Bump a version for a write that is about to happen or just happened.
+
+    It is bumped now, so the writer reads its own change, and again once the
+    transaction commits, because a reader may have cached the pre-commit
+    rows under the first new version.
+    """
+    bump_version(namespace, scope)
+    transaction.on_commit(lambda: bump_version(namespace, scope))
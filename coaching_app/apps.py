@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CoachingAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'coaching_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coaching_app', '0002_alter_reservation_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'time_slot', 'id'], name='reservation_user_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['coach', 'date', 'time_slot', 'id'], name='reservation_coach_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coaching_app', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['coach', 'date', 'status', 'time_slot'], name='reservation_coach_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'status'], name='reservation_user_status_idx'),
+        ),
+    ]
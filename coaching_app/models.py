@@ -1,7 +1,21 @@
+import datetime
+
 from django.db import models
 from authentication_app.models import User
 from django.utils import timezone
 
+def parse_available_days(value):
+    """The stored comma-separated days as a list"""
+    if not value:
+        return []
+    return [day.strip() for day in value.split(',')]
+
+
+def parse_time_slot(label):
+    """The (start, end) times of a time slot label such as '1:00 PM - 2:00 PM'"""
+    return tuple(datetime.datetime.strptime(part, '%I:%M %p').time() for part in label.split(' - '))
+
+
 class Coach(models.Model):
     DAY_CHOICES = [
         ('Monday', 'Monday'),
@@ -27,9 +41,7 @@ class Coach(models.Model):
         
     def get_available_days(self):
         """Return available days as a list"""
-        if not self.available_days:
-            return []
-        return [day.strip() for day in self.available_days.split(',')]
+        return parse_available_days(self.available_days)
     
     def set_available_days(self, days_list):
         """Set available days from a list"""
@@ -51,6 +63,8 @@ class Reservation(models.Model):
         ('2-3', '2:00 PM - 3:00 PM'),
         ('3-4', '3:00 PM - 4:00 PM'),
     ]
+    # The slot keys do not sort by time ('1-2' is after '11-12')
+    TIME_SLOT_TIMES = {slot: parse_time_slot(label) for slot, label in TIME_SLOT_CHOICES}
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_reservations')
     coach = models.ForeignKey(Coach, on_delete=models.CASCADE, related_name='coach_reservations')
@@ -68,3 +82,10 @@ class Reservation(models.Model):
     
     class Meta:
         ordering = ['date', 'time_slot']
+        indexes = [
+            models.Index(fields=['user', 'date', 'time_slot', 'id'], name='reservation_user_slot_idx'),
+            models.Index(fields=['coach', 'date', 'time_slot', 'id'], name='reservation_coach_slot_idx'),
+            # Booked-slot checks: a status filter on one day, reading only time_slot
+            models.Index(fields=['coach', 'date', 'status', 'time_slot'], name='reservation_coach_status_idx'),
+            models.Index(fields=['user', 'date', 'status'], name='reservation_user_status_idx'),
+        ]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Coach, Reservation
+from .models import Coach, Reservation, parse_available_days
 from authentication_app.serializers import UserSerializer
 from datetime import datetime
 
@@ -16,6 +16,9 @@ class CoachSerializer(serializers.ModelSerializer):
                   'hourly_rate', 'is_active', 'created_at', 'updated_at', 
                   'available_days']
         read_only_fields = ['created_at', 'updated_at']
+
+    # List fast path (backend.fastpath) mirror of to_representation
+    fast_fields = {'available_days': (['available_days'], parse_available_days)}
     
     def to_representation(self, instance):
         """Convert comma-separated days to list when serializing"""
@@ -65,9 +68,12 @@ class ReservationSerializer(serializers.ModelSerializer):
                   'date', 'time_slot', 'time_slot_display', 'day_of_week',
                   'status', 'cancellation_reason', 'created_at', 'updated_at','canceled_by_coach']  
         read_only_fields = ['created_at', 'updated_at', 'day_of_week','user']
+
+    # List fast path (backend.fastpath) mirror of get_day_of_week
+    fast_fields = {'day_of_week': (['date'], lambda date: date.strftime('%A'))}
     
     def get_day_of_week(self, obj):
-        return datetime.strptime(str(obj.date), '%Y-%m-%d').strftime('%A')
+        return obj.date.strftime('%A')
     
     def validate(self, data):
         # Validate that date is not in the past
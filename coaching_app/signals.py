@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentication_app.models import User
+from authentication_app.serializers import UserSerializer
+from backend.versioning import invalidate
+
+from .models import Coach, Reservation
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def reservation_changed(sender, instance, **kwargs):
+    invalidate('reservations', instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Coach)
+def coach_changed(sender, instance, **kwargs):
+    invalidate('coaches')
+
+
+@receiver(post_save, sender=User)
+def coach_user_changed(sender, instance, update_fields=None, **kwargs):
+    # Coach payloads embed the coach's user; logins only touch last_login
+    if update_fields is not None and update_fields.isdisjoint(UserSerializer.Meta.fields):
+        return
+    if Coach.objects.filter(user_id=instance.pk).exists():
+        invalidate('coaches')
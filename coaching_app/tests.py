@@ -1,3 +1,174 @@
-from django.test import TestCase
+import datetime
+import itertools
 
-# Create your tests here.
+from django.core.cache import caches
+from django.test import override_settings
+
+from authentication_app.models import User
+from backend.testing import IndexUsageTestCase, QueryBudgetTestCase
+from rest_framework.test import APITestCase
+
+from .models import Coach, Reservation
+from .views import ReservationViewSet
+
+_counter = itertools.count()
+
+
+class ListQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'pass')
+
+    def make_coach(self):
+        username = f'coach{next(_counter)}'
+        user = User.objects.create_user(username, f'{username}@example.com', 'pass')
+        return Coach.objects.create(
+            user=user, bio='bio', specialization='Mindfulness',
+            hourly_rate='50.00', available_days='Monday,Tuesday',
+        )
+
+    def test_coaches(self):
+        def make_rows(n):
+            for _ in range(n):
+                self.make_coach()
+        # One query for the ETag validator, one for the page
+        self.assertQueryBudget('/api/coaches/', 2, make_rows)
+
+    def test_reservations(self):
+        def make_rows(n):
+            Reservation.objects.bulk_create([
+                Reservation(user=self.user, coach=self.make_coach(),
+                            date=datetime.date(2030, 1, 7), time_slot='9-10')
+                for _ in range(n)
+            ])
+        # One query for the coach-profile check, one for the ETag validator, one for the page
+        self.assertQueryBudget('/api/reservations/', 3, make_rows)
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('regular', 'regular@example.com', 'pass')
+        coach_user = User.objects.create_user('guide', 'guide@example.com', 'pass')
+        self.coach = Coach.objects.create(
+            user=coach_user, bio='bio', specialization='Mindfulness',
+            hourly_rate='50.00', available_days='Monday',
+        )
+        self.reservation = Reservation.objects.create(
+            user=self.user, coach=self.coach, date=datetime.date(2030, 1, 7), time_slot='9-10',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_reservation_list_revalidates(self):
+        first = self.client.get('/api/reservations/')
+        etag = first['ETag']
+        self.assertEqual(self.client.get('/api/reservations/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.reservation.notes = 'Bring a journal'
+        self.reservation.save()
+        second = self.client.get('/api/reservations/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], etag)
+
+        self.reservation.delete()
+        self.assertEqual(self.client.get('/api/reservations/', HTTP_IF_NONE_MATCH=second['ETag']).status_code, 200)
+
+    def test_embedded_users_and_coaches_change_the_etags(self):
+        coach_etag = self.client.get('/api/coaches/')['ETag']
+        reservation_etag = self.client.get('/api/reservations/')['ETag']
+        # A profile edit through the API, as the coach would make it
+        self.client.force_authenticate(self.coach.user)
+        response = self.client.patch(f'/api/auth/users/{self.coach.user.pk}/', {'first_name': 'Guide'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/coaches/', HTTP_IF_NONE_MATCH=coach_etag).status_code, 200)
+        response = self.client.get('/api/reservations/', HTTP_IF_NONE_MATCH=reservation_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['coach_details']['user_details']['first_name'], 'Guide')
+
+        reservation_etag = response['ETag']
+        self.coach.bio = 'New bio'
+        self.coach.save()
+        self.assertEqual(self.client.get('/api/reservations/', HTTP_IF_NONE_MATCH=reservation_etag).status_code, 200)
+
+    def test_client_edits_change_the_coach_view(self):
+        self.client.force_authenticate(self.coach.user)
+        etag = self.client.get('/api/reservations/?as_coach=1')['ETag']
+        self.user.last_name = 'Client'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/reservations/?as_coach=1', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_coach_detail_sends_last_modified(self):
+        response = self.client.get(f'/api/coaches/{self.coach.pk}/')
+        self.assertIn('Last-Modified', response)
+        again = self.client.get(
+            f'/api/coaches/{self.coach.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.client.get('/api/coaches/0/').status_code, 404)
+
+
+class FastListTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('booker', 'booker@example.com', 'pass', first_name='Ren\u00e9e')
+        coach_user = User.objects.create_user('mentor', 'mentor@example.com', 'pass')
+        self.coach = Coach.objects.create(
+            user=coach_user, bio='bio', specialization='Mindfulness',
+            hourly_rate='49.50', available_days='Monday, Wednesday',
+        )
+        Coach.objects.create(
+            user=User.objects.create_user('idle', 'idle@example.com', 'pass'), bio='bio',
+            specialization='Sleep', hourly_rate='10.00', available_days='',
+        )
+        for day, slot, status in ((7, '9-10', 'pending'), (9, '2-3', 'confirmed'), (14, '1-2', 'canceled')):
+            Reservation.objects.create(
+                user=self.user, coach=self.coach, date=datetime.date(2030, 1, day), time_slot=slot, status=status,
+            )
+        Reservation.objects.create(user=coach_user, coach=self.coach, date=datetime.date(2030, 1, 8), time_slot='9-10')
+
+    def assertSameAsSerializer(self, url):
+        for cache in caches.all():
+            cache.clear()
+        fast = self.client.get(url)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast.json()
+
+    def test_parity(self):
+        self.client.force_authenticate(self.user)
+        rows = self.assertSameAsSerializer('/api/reservations/')['results']
+        self.assertEqual(rows[0]['day_of_week'], 'Monday')
+        self.assertEqual(rows[0]['time_slot_display'], '9:00 AM - 10:00 AM')
+        self.assertEqual(rows[0]['coach_details']['available_days'], ['Monday', 'Wednesday'])
+        self.assertSameAsSerializer('/api/coaches/')
+        self.assertSameAsSerializer('/api/coaches/?day=Monday')
+
+        self.client.force_authenticate(self.coach.user)
+        self.assertSameAsSerializer('/api/reservations/?as_coach=1')
+
+
+class IndexUsageTests(IndexUsageTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('planner', 'planner@example.com', 'pass')
+        self.coach = Coach.objects.create(
+            user=User.objects.create_user('coach', 'coach@example.com', 'pass'), bio='bio',
+            specialization='Sleep', hourly_rate='10.00', available_days='Monday',
+        )
+        self.day = datetime.date(2030, 1, 7)
+
+    def test_reservation_lists(self):
+        for user, params in ((self.user, None), (self.coach.user, {'as_coach': '1'})):
+            queryset = self.viewset_queryset(ReservationViewSet, user, params)
+            self.assertIndexed(queryset.order_by(*ReservationViewSet.ordering))
+
+    def test_booked_slot_checks(self):
+        active = ['pending', 'confirmed']
+        self.assertIndexed(Reservation.objects.filter(
+            coach=self.coach, date=self.day, status__in=active,
+        ).values_list('time_slot', flat=True))
+        self.assertIndexed(Reservation.objects.filter(user=self.user, date=self.day, status__in=active))
+        self.assertIndexed(Reservation.objects.filter(coach=self.coach, date=self.day).exclude(canceled_by_coach=False))
@@ -7,28 +7,36 @@ from datetime import datetime
 from .models import Coach, Reservation
 from .serializers import CoachSerializer, ReservationSerializer, CancelReservationSerializer
 from rest_framework.decorators import api_view, permission_classes
+from backend.conditional import ConditionalGetMixin
+from backend.fastpath import FastListMixin
+from backend.pagination import KeysetPagination
 
 
 
-class CoachViewSet(viewsets.ModelViewSet):
+class CoachViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = CoachSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('id',)
+    # The payload embeds the coach's user
+    etag_updated_field = ('updated_at', 'user__updated_at')
     
     def get_queryset(self):
         # If user is looking for their own coach profile
+        queryset = Coach.objects.select_related('user')
         if self.request.query_params.get('my_profile', False):
-            return Coach.objects.filter(user=self.request.user)
+            return queryset.filter(user=self.request.user)
         
         # Filter by day if provided
         day = self.request.query_params.get('day', None)
         if day:
-            return Coach.objects.filter(
+            return queryset.filter(
                 is_active=True,
                 available_days__contains=day
             )
         
         # Otherwise return all active coaches
-        return Coach.objects.filter(is_active=True)
+        return queryset.filter(is_active=True)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -81,12 +89,17 @@ class CoachViewSet(viewsets.ModelViewSet):
             "available_slots": available_slots
         })
 
-class ReservationViewSet(viewsets.ModelViewSet):
+class ReservationViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('date', 'time_slot', 'id')
+    # The payload embeds the client, the coach and the coach's user
+    etag_updated_field = ('updated_at', 'user__updated_at', 'coach__updated_at', 'coach__user__updated_at')
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Reservation.objects.select_related('user', 'coach__user')
         
         # Check if the user is a coach
         try:
@@ -94,12 +107,12 @@ class ReservationViewSet(viewsets.ModelViewSet):
             # import pdb; pdb.set_trace()
             # If viewing as coach, show all reservations for this coach
             if self.request.query_params.get('as_coach', False):
-                return Reservation.objects.filter(coach=coach)
+                return queryset.filter(coach=coach)
         except Coach.DoesNotExist:
             pass
         
         # Default: show user's reservations
-        return Reservation.objects.filter(user=user)
+        return queryset.filter(user=user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -42,4 +42,21 @@ class VisionBoardAdmin(admin.ModelAdmin):
 # book
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    pass
\ No newline at end of file
+    pass
+
+@admin.register(HabitStreak)
+class HabitStreakAdmin(admin.ModelAdmin):
+    list_display = ('user', 'habit', 'streak_length', 'longest_streak', 'last_done_date', 'computed_on')
+
+@admin.register(ArticleChatSession)
+class ArticleChatSessionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'article', 'created_at', 'updated_at')
+
+@admin.register(ArticleInsight)
+class ArticleInsightAdmin(admin.ModelAdmin):
+    list_display = ('article', 'status', 'provider', 'updated_at')
+    list_filter = ('status',)
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
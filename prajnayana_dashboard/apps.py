@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PrajnayanaDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'prajnayana_dashboard'
+
+    def ready(self):
+        from backend import checks  # noqa: F401
+        from . import signals  # noqa: F401
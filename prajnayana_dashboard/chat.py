@@ -0,0 +1,69 @@
+"""
+Server-side article chat sessions.
+
+The prompt for a question is built from the article as stored in the
+database, the session's running summary and as many of the latest turns as
+fit in ``LLM_CHAT_HISTORY_TOKENS``. Turns that no longer fit are folded into
+the summary; if summarizing fails they are left out of that prompt and
+folded in on a later question. The full conversation is always kept in
+``ArticleChatSession.messages``.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from . import llm
+from .models import ArticleChatSession
+
+
+def _summary_message(summary):
+    return {"role": "system", "content": f"Summary of the earlier conversation: {summary}"}
+
+
+def build_conversation(session, question, budget=None):
+    """
+    The conversation to send upstream for ``question``, with the summary and
+    summarized message count the session should record once it is answered.
+    """
+    budget = settings.LLM_CHAT_HISTORY_TOKENS if budget is None else budget
+    pending = session.messages + [{"role": "user", "content": question}]
+    summary = session.summary
+    reserved = llm.estimate_tokens([_summary_message(summary)]) if summary else 0
+
+    start = session.summarized_messages
+    while start < len(pending) - 1 and reserved + llm.estimate_tokens(pending[start:]) > budget:
+        start += 1
+    # Never open the window on an assistant reply to a question it no longer shows
+    while start < len(pending) - 1 and pending[start]["role"] != "user":
+        start += 1
+
+    summarized = session.summarized_messages
+    if start > summarized:
+        try:
+            summary = llm.summarize_conversation(summary, pending[summarized:start])
+            summarized = start
+        except Exception:
+            # Only the prompt is truncated; the turns stay due for summarizing
+            pass
+
+    conversation = pending[start:]
+    if summary:
+        conversation = [_summary_message(summary)] + conversation
+    return conversation, summary, summarized
+
+
+def ask(session, question):
+    """Answer ``question`` within ``session`` and store the turn. Returns ``(session, reply, cached)``."""
+    conversation, summary, summarized = build_conversation(session, question)
+    reply, cached = llm.complete_chat(session.article.content, conversation)
+
+    # Append under a row lock so concurrent questions on one session both land
+    with transaction.atomic():
+        session = ArticleChatSession.objects.select_for_update().select_related('article').get(pk=session.pk)
+        session.messages = session.messages + [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": reply},
+        ]
+        if summarized > session.summarized_messages:
+            session.summary, session.summarized_messages = summary, summarized
+        session.save(update_fields=['messages', 'summary', 'summarized_messages', 'updated_at'])
+    return session, reply, cached
@@ -0,0 +1,125 @@
+"""
+The home screen in one response: today's habits, the latest journal mood,
+the last assessment score, favorite vision-board items and the next
+coaching reservation.
+
+Each section is cached on its own, under a key built from the data
+versions it depends on (see ``backend.versioning``) and today's date, so a
+journal entry only rebuilds the mood section and a fully cached dashboard
+runs no queries. Every section that misses costs exactly one query.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Exists, OuterRef, Q, TimeField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from backend.versioning import get_versions
+from coaching_app.models import Reservation
+from coaching_app.serializers import ReservationSerializer
+
+from .models import Habits, HabitTracking, JournalEntry, TestSession, VisionBoard
+from .serializers import TestSessionSerializer
+
+_timestamp = serializers.DateTimeField()
+
+
+def habits(user, today):
+    """Every habit the user sees, with whether it is done today."""
+    rows = list(
+        Habits.objects.filter(Q(user=user) | Q(user__isnull=True))
+        .annotate(is_done=Exists(HabitTracking.objects.filter(
+            user=user, habit=OuterRef('pk'), date=today, is_done=True,
+        )))
+        .order_by('id')
+        .values('id', 'habit', 'is_done')
+    )
+    return {"done": sum(row['is_done'] for row in rows), "total": len(rows), "items": rows}
+
+
+def mood(user, today):
+    entry = (
+        JournalEntry.objects.filter(user=user).order_by('-timestamp', '-id')
+        .values('id', 'date', 'mood', 'timestamp').first()
+    )
+    if entry is not None:
+        entry['timestamp'] = _timestamp.to_representation(entry['timestamp'])
+    return entry
+
+
+def last_assessment(user, today):
+    session = (
+        TestSession.objects.filter(user=user, score__isnull=False)
+        .select_related('user').order_by('-date_taken', '-id').first()
+    )
+    return TestSessionSerializer(session).data if session is not None else None
+
+
+def vision_board(user, today):
+    return list(
+        VisionBoard.objects.filter(user=user, favorite=True).order_by('id').values('id', 'content', 'category')
+    )
+
+
+def slots_ended(now):
+    """The time slots of ``now``'s day that are over."""
+    return [slot for slot, (_, end) in Reservation.TIME_SLOT_TIMES.items() if end <= now.time()]
+
+
+def next_reservation(user, today):
+    """The first reservation that has not ended, in slot time order."""
+    slot_start = Case(
+        *[When(time_slot=slot, then=Value(start)) for slot, (start, _) in Reservation.TIME_SLOT_TIMES.items()],
+        output_field=TimeField(),
+    )
+    reservation = (
+        Reservation.objects.filter(user=user, date__gte=today, status__in=['pending', 'confirmed'])
+        .exclude(date=today, time_slot__in=slots_ended(timezone.localtime()))
+        .select_related('user', 'coach__user').order_by('date', slot_start, 'id').first()
+    )
+    return ReservationSerializer(reservation).data if reservation is not None else None
+
+
+# Section name -> (builder, the (namespace, scoped to the user?) versions it depends on)
+SECTIONS = {
+    'habits': (habits, [('habits', True), ('habits', False)]),
+    'mood': (mood, [('journal', True)]),
+    'last_assessment': (last_assessment, [('assessment', True), ('user', True)]),
+    'vision_board': (vision_board, [('vision_board', True)]),
+    # The reservation embeds the user and the coach, whose user edits bump 'coaches' too
+    'next_reservation': (next_reservation, [('reservations', True), ('user', True), ('coaches', False)]),
+}
+
+
+def section_keys(user, today):
+    """The cache key of every section for ``user`` on ``today``."""
+    wanted = [
+        (namespace, user.pk if scoped else None)
+        for _, versions in SECTIONS.values() for namespace, scoped in versions
+    ]
+    values = iter(get_versions(wanted))
+    keys = {}
+    for name, (_, versions) in SECTIONS.items():
+        stamp = '.'.join(str(next(values)) for _ in versions)
+        keys[name] = f"dashboard:{name}:{user.pk}:{today.isoformat()}:{stamp}"
+    # The next reservation also moves on as today's slots end
+    keys['next_reservation'] += f":{len(slots_ended(timezone.localtime()))}"
+    return keys
+
+
+def home(user):
+    """``(data, names of the sections that were rebuilt)``."""
+    today = timezone.localdate()
+    keys = section_keys(user, today)
+    cached = cache.get_many(keys.values())
+    data, fresh = {"date": today.isoformat()}, {}
+    for name, key in keys.items():
+        if key in cached:
+            data[name], = cached[key]
+        else:
+            data[name] = SECTIONS[name][0](user, today)
+            # Wrapped so that an empty section (None) is cached too
+            fresh[key] = (data[name],)
+    if fresh:
+        cache.set_many(fresh, settings.DASHBOARD_CACHE_TTL)
+    return data, [name for name, key in keys.items() if key in fresh]
@@ -0,0 +1,211 @@
+"""
+Precomputed article insights: a summary, key terms with definitions and
+reflective questions, generated offline and served from ``ArticleInsight``.
+
+Work is keyed by a content hash of the article text and the provider, so
+reruns skip articles whose insights are current and pick up where an
+interrupted run stopped. ``precompute`` is the batch entry point used by the
+``precompute_article_insights`` command; saving an article marks its
+insights stale and, with ``ARTICLE_INSIGHTS_ON_SAVE``, queues a refresh.
+
+Providers are plain classes named by ``ARTICLE_INSIGHT_PROVIDER`` with a
+``name``, a ``version`` and ``generate(article)`` returning the three fields.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from .llm_gateway import get_gateway
+from .models import Article, ArticleInsight, ArticleInsightStatus
+
+_STOPWORDS = frozenset("""
+    about above after again against because been before being below between both could does doing
+    during each from further having here itself just more most other ought ourselves over same
+    should some such than that their theirs them themselves then there these they this those
+    through under until very were what when where which while whom with would your yours yourself
+""".split())
+
+_SENTENCE = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]{4,}")
+
+
+class LocalInsightProvider:
+    """Deterministic, offline provider built from the article text alone."""
+    name = 'local'
+    version = '1'
+    term_count = 6
+
+    def generate(self, article):
+        sentences = [sentence.strip() for sentence in _SENTENCE.split(article.content.strip()) if sentence.strip()]
+        counts = Counter(
+            word.lower() for word in _WORD.findall(article.content) if word.lower() not in _STOPWORDS
+        )
+        key_terms = []
+        for term, _ in counts.most_common(self.term_count):
+            definition = next((sentence for sentence in sentences if term in sentence.lower()), '')
+            key_terms.append({"term": term, "definition": definition})
+        questions = [q for q in (article.reflective_question_1, article.reflective_question_2) if q]
+        questions += [f"Where does {item['term']} show up in your own life?" for item in key_terms[:2 - len(questions)]]
+        return {
+            "summary": " ".join(sentences[:2]),
+            "key_terms": key_terms,
+            "reflective_questions": questions,
+        }
+
+
+class LLMInsightProvider:
+    """Asks the chat model for the insights as a JSON object."""
+    version = '1'
+    prompt = (
+        "You prepare study material for a wellbeing article. Reply with only a JSON object with the keys "
+        "\"summary\" (two or three sentences), \"key_terms\" (a list of up to six objects with \"term\" and "
+        "\"definition\", explaining terms a reader may not know) and \"reflective_questions\" (a list of two "
+        "questions that help the reader apply the article to their own life)."
+    )
+
+    @property
+    def name(self):
+        return f"llm:{settings.LLM_MODEL}"
+
+    def generate(self, article):
+        reply = get_gateway().complete([
+            {"role": "system", "content": self.prompt},
+            {"role": "user", "content": f"{article.title}\n\n{article.content}"},
+        ], settings.LLM_MODEL)
+        # Tolerate a fenced code block around the JSON
+        data = json.loads(reply.strip().removeprefix('```json').strip('`'))
+        return {
+            "summary": str(data.get("summary", "")),
+            "key_terms": [
+                {"term": str(item.get("term", "")), "definition": str(item.get("definition", ""))}
+                for item in data.get("key_terms", [])
+            ],
+            "reflective_questions": [str(question) for question in data.get("reflective_questions", [])],
+        }
+
+
+def get_provider():
+    return import_string(settings.ARTICLE_INSIGHT_PROVIDER)()
+
+
+def content_hash(article, provider):
+    payload = json.dumps([provider.name, provider.version, article.title, article.content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_current(insight, article, provider=None):
+    return (
+        insight.status == ArticleInsightStatus.READY
+        and insight.content_hash == content_hash(article, provider or get_provider())
+    )
+
+
+def compute(article_id, provider=None, force=False):
+    """Generate and store one article's insights. Returns 'computed', 'skipped' or 'failed'."""
+    provider = provider or get_provider()
+    try:
+        article = Article.objects.only(
+            'title', 'content', 'reflective_question_1', 'reflective_question_2'
+        ).get(pk=article_id)
+    except Article.DoesNotExist:
+        return 'skipped'
+    digest = content_hash(article, provider)
+    if not force and ArticleInsight.objects.filter(
+        article_id=article_id, content_hash=digest, status=ArticleInsightStatus.READY
+    ).exists():
+        return 'skipped'
+
+    insight = ArticleInsight(article_id=article_id, content_hash=digest, provider=provider.name)
+    try:
+        for field, value in provider.generate(article).items():
+            setattr(insight, field, value)
+        outcome = 'computed'
+    except Exception as e:
+        insight.status, insight.error = ArticleInsightStatus.FAILED, str(e)[:1000]
+        outcome = 'failed'
+    # A single upsert, so parallel workers never hold a read-then-write transaction
+    ArticleInsight.objects.bulk_create(
+        [insight],
+        update_conflicts=True,
+        unique_fields=['article'],
+        update_fields=[
+            'content_hash', 'status', 'provider', 'summary', 'key_terms',
+            'reflective_questions', 'error', 'updated_at',
+        ],
+    )
+    return outcome
+
+
+def _compute_in_worker(article_id, provider=None, force=False):
+    try:
+        return compute(article_id, provider, force)
+    finally:
+        connection.close()
+
+
+def pending_articles(provider, article_ids=None, force=False):
+    """Ids of the articles whose insights are missing, stale or failed."""
+    articles = Article.objects.order_by('id')
+    if article_ids:
+        articles = articles.filter(pk__in=article_ids)
+    rows = articles.values_list('id', 'title', 'content', 'insight__content_hash', 'insight__status')
+    for pk, title, content, stored_hash, stored_status in rows.iterator(chunk_size=200):
+        digest = content_hash(Article(title=title, content=content), provider)
+        if force or stored_status != ArticleInsightStatus.READY or stored_hash != digest:
+            yield pk
+
+
+def precompute(article_ids=None, workers=4, force=False, provider=None, progress=None):
+    """
+    Bring every article's insights up to date with at most ``workers``
+    generations in flight. Returns a count per outcome.
+    """
+    provider = provider or get_provider()
+    outcomes = Counter()
+
+    def record(article_id, outcome):
+        outcomes[outcome] += 1
+        if progress:
+            progress(article_id, outcome)
+
+    pending = list(pending_articles(provider, article_ids, force))
+    if workers <= 1:
+        for article_id in pending:
+            record(article_id, compute(article_id, provider, force))
+        return outcomes
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {article_id: executor.submit(_compute_in_worker, article_id, provider, force) for article_id in pending}
+        for article_id, future in futures.items():
+            record(article_id, future.result())
+    return outcomes
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def schedule(article_id):
+    """Refresh one article's insights in the background of this process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ARTICLE_INSIGHT_WORKERS, thread_name_prefix='article-insights'
+            )
+    _executor.submit(_compute_in_worker, article_id)
+
+
+def article_saved(article):
+    """Mark insights generated from older text as stale, and queue a refresh if enabled."""
+    digest = content_hash(article, get_provider())
+    ArticleInsight.objects.filter(article_id=article.pk, status=ArticleInsightStatus.READY) \
+        .exclude(content_hash=digest).update(status=ArticleInsightStatus.STALE)
+    if settings.ARTICLE_INSIGHTS_ON_SAVE:
+        transaction.on_commit(lambda: schedule(article.pk))
@@ -0,0 +1,226 @@
+"""
+Chat completions for the article assistant.
+
+Answers are cached under a content address: a hash of the model name, the
+article text and the normalized conversation, so the same question about
+the same article is only ever sent upstream once per TTL. Concurrent
+identical requests are collapsed: one caller asks upstream and the others
+wait for its answer. ``stream_chat`` is the async, token-by-token variant
+used by the server-sent events endpoint; it shares the same cache.
+``summarize_conversation`` condenses old turns of stored chat sessions.
+Upstream calls are made through the shared ``llm_gateway``.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .llm_gateway import get_gateway
+
+METRICS = ('hits', 'misses', 'coalesced', 'upstream_errors')
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def response_cache():
+    return caches[settings.LLM_CACHE_ALIAS]
+
+
+def system_prompt(article_content):
+    return {
+        "role": "system",
+        "content": (
+            f"The following is the article content:\n\n{article_content}\n\n"
+            "You are a helpful assistant that answers questions based only on the content of the provided article. "
+            "You need to explain or define terms mentioned in the article if the explanation helps understand the article better. "
+            "Do not answer unrelated questions (e.g., math, general advice). "
+            "If the user asks something not relevant to the article, respond with: "
+            "'I'm only able to answer questions based on the article content.'"
+        )
+    }
+
+
+def normalize_conversation(conversation):
+    """Roles lowercased and whitespace collapsed, so trivially different requests share an entry."""
+    return [
+        {
+            "role": str(message.get("role", "")).strip().lower(),
+            "content": " ".join(str(message.get("content", "")).split()),
+        }
+        for message in conversation
+    ]
+
+
+def cache_key(article_content, conversation, model):
+    article_hash = hashlib.sha256(article_content.encode('utf-8')).hexdigest()
+    payload = json.dumps(
+        {"model": model, "article": article_hash, "conversation": normalize_conversation(conversation)},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return f"llm:completion:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def _count(metric):
+    cache = response_cache()
+    key = f"llm:metrics:{metric}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def _acount(metric):
+    cache = response_cache()
+    key = f"llm:metrics:{metric}"
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def cache_metrics():
+    values = response_cache().get_many([f"llm:metrics:{metric}" for metric in METRICS])
+    metrics = {metric: values.get(f"llm:metrics:{metric}", 0) for metric in METRICS}
+    lookups = metrics['hits'] + metrics['misses']
+    metrics['hit_ratio'] = round(metrics['hits'] / lookups, 4) if lookups else None
+    return metrics
+
+
+def _request_completion(messages, model):
+    return get_gateway().complete(messages, model)
+
+
+def estimate_tokens(messages):
+    """Rough prompt size of ``messages``: about four characters per token plus framing."""
+    return sum(len(message["content"]) // 4 + 4 for message in messages)
+
+
+def summarize_conversation(summary, messages, model=None):
+    """Fold ``messages`` into the running ``summary`` of an article chat."""
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    if summary:
+        transcript = f"Summary so far: {summary}\n\n{transcript}"
+    prompt = [
+        {
+            "role": "system",
+            "content": (
+                "Summarize this conversation between a user and an assistant about an article in a few sentences. "
+                "Keep the questions asked and the terms and facts explained, so the conversation can continue from the summary."
+            ),
+        },
+        {"role": "user", "content": transcript},
+    ]
+    try:
+        return _request_completion(prompt, model or settings.LLM_MODEL)
+    except Exception:
+        _count('upstream_errors')
+        raise
+
+
+def _single_flight(key, compute, wait_timeout):
+    """Run ``compute`` once per key in this process; concurrent callers share its result."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        _count('coalesced')
+        return future.result(timeout=wait_timeout)
+    try:
+        result = compute()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def _wait_for_answer(cache, key, lock_key, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and cache.get(lock_key) is not None:
+        answer = cache.get(key)
+        if answer is not None:
+            return answer
+        time.sleep(0.05)
+    return cache.get(key)
+
+
+def complete_chat(article_content, conversation, model=None, wait_timeout=120):
+    """
+    Answer the latest question of ``conversation`` (role/content dicts, no
+    system message) about ``article_content``. Returns ``(reply, cached)``.
+    """
+    model = model or settings.LLM_MODEL
+    cache = response_cache()
+    key = cache_key(article_content, conversation, model)
+
+    reply = cache.get(key)
+    if reply is not None:
+        _count('hits')
+        return reply, True
+    _count('misses')
+
+    def compute():
+        # Another worker process may be asking the same thing; let it
+        # publish its answer instead of asking upstream twice.
+        lock_key = f"{key}:lock"
+        owns_lock = cache.add(lock_key, 1, timeout=wait_timeout)
+        if not owns_lock:
+            answer = _wait_for_answer(cache, key, lock_key, wait_timeout)
+            if answer is not None:
+                return answer
+        try:
+            try:
+                answer = _request_completion([system_prompt(article_content)] + list(conversation), model)
+            except Exception:
+                _count('upstream_errors')
+                raise
+            # Published before the lock goes, so a waiter that sees it gone
+            # finds the answer instead of asking upstream again
+            cache.set(key, answer, settings.LLM_CACHE_TTL)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+        return answer
+
+    return _single_flight(key, compute, wait_timeout), False
+
+
+async def stream_chat(article_content, conversation, model=None):
+    """
+    Async generator over the pieces of the reply to ``conversation``. A
+    cached reply comes out as a single piece; a fresh one is cached once the
+    stream has completed.
+    """
+    model = model or settings.LLM_MODEL
+    cache = response_cache()
+    key = cache_key(article_content, conversation, model)
+
+    reply = await cache.aget(key)
+    if reply is not None:
+        await _acount('hits')
+        yield reply
+        return
+    await _acount('misses')
+
+    parts = []
+    try:
+        async for delta in get_gateway().stream([system_prompt(article_content)] + list(conversation), model):
+            parts.append(delta)
+            yield delta
+    except Exception:
+        await _acount('upstream_errors')
+        raise
+    await cache.aset(key, "".join(parts).strip(), settings.LLM_CACHE_TTL)
@@ -0,0 +1,422 @@
+"""
+The one way out to the chat completions API.
+
+A gateway owns a pooled HTTP client that is reused across requests, and it
+bounds how many upstream calls are in flight: ``max_concurrency`` per process
+(a semaphore) and ``global_concurrency`` across processes (leases in the LLM
+cache, shared when that cache is shared). Every call has a deadline; failed
+attempts that are worth repeating are retried with jittered exponential
+backoff inside it. After ``breaker_threshold`` calls in a row have failed, the
+circuit opens and calls fail immediately with ``CircuitOpen`` until
+``breaker_cooldown`` has passed and a single trial call gets through.
+
+``get_gateway()`` returns the process-wide gateway for the current settings.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+import openai
+from django.conf import settings
+from django.core.cache import caches
+
+RETRYABLE = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+COUNTERS = ('calls', 'succeeded', 'failed', 'retries', 'timeouts', 'rejected_open', 'rejected_saturated')
+
+
+class Unavailable(Exception):
+    """The gateway refused or gave up on a call; the caller may try again later."""
+    retry_after = 1
+
+
+class CircuitOpen(Unavailable):
+    pass
+
+
+class Saturated(Unavailable):
+    pass
+
+
+class DeadlineExceeded(Unavailable):
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open trial call."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.cooldown - (time.monotonic() - self.opened_at) + 1))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """End a trial call that said nothing about upstream health."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class LLMGateway:
+
+    def __init__(self, api_key=None, base_url=None, timeout=30, deadline=60, max_retries=2,
+                 retry_backoff=0.5, max_concurrency=8, global_concurrency=0, queue_timeout=2,
+                 breaker_threshold=5, breaker_cooldown=30, cache_alias=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_concurrency = max_concurrency
+        self.global_concurrency = global_concurrency
+        self.queue_timeout = queue_timeout
+        self.cache_alias = cache_alias
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._latencies = deque(maxlen=1000)
+
+    # Clients
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout,
+                        http_client=httpx.Client(limits=self._limits(), timeout=self.timeout),
+                    )
+        return self._client
+
+    def async_client(self):
+        # httpx async pools belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout,
+                http_client=httpx.AsyncClient(limits=self._limits(), timeout=self.timeout),
+            )
+            # Kept with the client, the loop only holds its tasks weakly
+            entry = self._async_clients[loop] = (client, loop.create_task(self._close_with_loop(client)))
+        return entry[0]
+
+    async def _close_with_loop(self, client):
+        """
+        Close ``client`` when its loop shuts down. asyncio.run() and
+        async_to_sync (a new loop per call under WSGI) both cancel the tasks
+        still pending at that point, so a client never outlives its loop with
+        its connections open.
+        """
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            self._async_clients.pop(asyncio.get_running_loop(), None)
+            await client.close()
+
+    # Metrics
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _enter(self):
+        with self._lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _exit(self, started):
+        with self._lock:
+            self._in_flight -= 1
+            self._latencies.append(time.monotonic() - started)
+
+    def metrics(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            metrics = dict(self._counters)
+            metrics.update({
+                'in_flight': self._in_flight,
+                'peak_in_flight': self._peak_in_flight,
+                'max_concurrency': self.max_concurrency,
+                'saturation': round(self._in_flight / self.max_concurrency, 4),
+            })
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        metrics['latency_ms'] = {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+        metrics['circuit'] = self.breaker.state
+        return metrics
+
+    # Admission
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._count('rejected_open')
+            error = CircuitOpen("The assistant is temporarily unavailable.")
+            error.retry_after = self.breaker.retry_after()
+            raise error
+
+    def _slot_keys(self):
+        offset = random.randrange(self.global_concurrency)
+        return [f"llm:gateway:slot:{(offset + i) % self.global_concurrency}" for i in range(self.global_concurrency)]
+
+    def _take_global_slot(self):
+        if not self.global_concurrency:
+            return True
+        cache = caches[self.cache_alias]
+        for key in self._slot_keys():
+            # Leases expire on their own, so a crashed worker cannot leak a slot
+            if cache.add(key, 1, timeout=self.deadline + 5):
+                return key
+        return None
+
+    async def _atake_global_slot(self):
+        if not self.global_concurrency:
+            return True
+        cache = caches[self.cache_alias]
+        for key in self._slot_keys():
+            if await cache.aadd(key, 1, timeout=self.deadline + 5):
+                return key
+        return None
+
+    def _release_global_slot(self, slot):
+        if slot is not True:
+            caches[self.cache_alias].delete(slot)
+
+    def _saturated(self):
+        self._count('rejected_saturated')
+        return Saturated("Too many assistant requests are in progress.")
+
+    @contextmanager
+    def _slot(self):
+        queue_deadline = time.monotonic() + self.queue_timeout
+        if not self._semaphore.acquire(timeout=self.queue_timeout):
+            raise self._saturated()
+        try:
+            slot = self._take_global_slot()
+            while not slot and time.monotonic() < queue_deadline:
+                time.sleep(0.05)
+                slot = self._take_global_slot()
+            if not slot:
+                raise self._saturated()
+            try:
+                yield
+            finally:
+                self._release_global_slot(slot)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def _aslot(self):
+        queue_deadline = time.monotonic() + self.queue_timeout
+        # The semaphore is shared with sync callers, so poll rather than block the loop
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= queue_deadline:
+                raise self._saturated()
+            await asyncio.sleep(0.05)
+        try:
+            slot = await self._atake_global_slot()
+            while not slot and time.monotonic() < queue_deadline:
+                await asyncio.sleep(0.05)
+                slot = await self._atake_global_slot()
+            if not slot:
+                raise self._saturated()
+            try:
+                yield
+            finally:
+                self._release_global_slot(slot)
+        finally:
+            self._semaphore.release()
+
+    # Calls
+
+    def _backoff(self, attempt, remaining):
+        """Full-jitter exponential backoff, never sleeping past the deadline."""
+        return min(random.uniform(0, self.retry_backoff * 2 ** attempt), max(0, remaining))
+
+    def _give_up(self, exc):
+        if isinstance(exc, Saturated):
+            # Our own queue being full says nothing about upstream health
+            self.breaker.release_trial()
+            raise exc
+        self._count('failed')
+        if not isinstance(exc, RETRYABLE):
+            # Upstream answered, it just refused this request
+            self.breaker.release_trial()
+            raise exc
+        self.breaker.record_failure()
+        if isinstance(exc, openai.APITimeoutError):
+            self._count('timeouts')
+            raise DeadlineExceeded("The assistant did not answer in time.") from exc
+        raise exc
+
+    def complete(self, messages, model, deadline=None):
+        """Reply text for ``messages``, within ``deadline`` seconds including retries and queueing."""
+        self._admit()
+        self._count('calls')
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        try:
+            with self._slot():
+                started = time.monotonic()
+                self._enter()
+                try:
+                    attempt = 0
+                    while True:
+                        remaining = give_up_at - time.monotonic()
+                        if remaining <= 0:
+                            raise openai.APITimeoutError(request=httpx.Request('POST', 'chat/completions'))
+                        try:
+                            response = self.client.with_options(timeout=min(self.timeout, remaining)) \
+                                .chat.completions.create(model=model, messages=messages)
+                            break
+                        except RETRYABLE:
+                            remaining = give_up_at - time.monotonic()
+                            if attempt >= self.max_retries or remaining <= 0:
+                                raise
+                            time.sleep(self._backoff(attempt, remaining))
+                            attempt += 1
+                            self._count('retries')
+                finally:
+                    self._exit(started)
+        except Exception as exc:
+            self._give_up(exc)
+        self._count('succeeded')
+        self.breaker.record_success()
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages, model, deadline=None):
+        """
+        Async generator over the pieces of the reply. Only opening the stream
+        is retried: once a piece has been yielded a failure is final.
+        """
+        self._admit()
+        self._count('calls')
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        try:
+            async with self._aslot():
+                started = time.monotonic()
+                self._enter()
+                try:
+                    attempt = 0
+                    while True:
+                        remaining = give_up_at - time.monotonic()
+                        if remaining <= 0:
+                            raise openai.APITimeoutError(request=httpx.Request('POST', 'chat/completions'))
+                        try:
+                            stream = await self.async_client().with_options(timeout=min(self.timeout, remaining)) \
+                                .chat.completions.create(model=model, messages=messages, stream=True)
+                            break
+                        except RETRYABLE:
+                            remaining = give_up_at - time.monotonic()
+                            if attempt >= self.max_retries or remaining <= 0:
+                                raise
+                            await asyncio.sleep(self._backoff(attempt, remaining))
+                            attempt += 1
+                            self._count('retries')
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            yield delta
+                finally:
+                    self._exit(started)
+        except (GeneratorExit, asyncio.CancelledError):
+            # The consumer went away mid-stream, or its task was cancelled (an
+            # SSE client disconnecting); neither is an Exception, and a
+            # half-open trial left running would keep the circuit open
+            self.breaker.release_trial()
+            raise
+        except Exception as exc:
+            self._give_up(exc)
+        self._count('succeeded')
+        self.breaker.record_success()
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway():
+    """The shared gateway for the current settings (a new one if they change, e.g. in tests)."""
+    config = dict(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        timeout=settings.LLM_TIMEOUT,
+        deadline=settings.LLM_DEADLINE,
+        max_retries=settings.LLM_MAX_RETRIES,
+        retry_backoff=settings.LLM_RETRY_BACKOFF,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        global_concurrency=settings.LLM_GLOBAL_CONCURRENCY,
+        queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+        breaker_threshold=settings.LLM_BREAKER_THRESHOLD,
+        breaker_cooldown=settings.LLM_BREAKER_COOLDOWN,
+        cache_alias=settings.LLM_CACHE_ALIAS,
+    )
+    key = tuple(sorted(config.items()))
+    gateway = _gateways.get(key)
+    if gateway is None:
+        with _gateways_lock:
+            gateway = _gateways.get(key)
+            if gateway is None:
+                gateway = _gateways[key] = LLMGateway(**config)
+    return gateway
@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from prajnayana_dashboard.models import Article
+from prajnayana_dashboard.search import article_index
+
+WORDS = (
+    'mindful breath awareness calm anxiety resilience gratitude emotion journal habit '
+    'compassion focus sleep stress balance growth reflection kindness patience courage '
+    'meditation presence acceptance curiosity boundaries energy rest healing trust hope'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Compares p50/p95 latency of the full-text article search against the legacy icontains query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--words', type=int, default=150, help='Words of content per generated article')
+        parser.add_argument('--limit', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if not article_index.is_available():
+            raise CommandError('No full-text index on this database, run the migrations first')
+
+        rng = random.Random(42)
+        # Rare generated words make the legacy scan walk the whole table
+        vocabulary = WORDS + [f'term{i}' for i in range(5000)]
+        queries = [rng.choice(vocabulary) for _ in range(options['queries'])]
+
+        for size in options['sizes']:
+            # Everything happens inside a transaction that is rolled back at the end
+            with transaction.atomic():
+                self._populate(size, vocabulary, options['words'], rng)
+                legacy = self._measure(lambda q: self._legacy(q, options['limit']), queries)
+                fts = self._measure(lambda q: self._fts(q, options['limit']), queries)
+                transaction.set_rollback(True)
+
+            self.stdout.write(f'{size} articles, {len(queries)} queries')
+            self._report('icontains', legacy)
+            self._report('full-text', fts)
+
+    def _populate(self, size, vocabulary, words, rng):
+        Article.objects.all().delete()
+        batch = []
+        for i in range(size):
+            batch.append(Article(
+                title=' '.join(rng.choices(vocabulary, k=4)),
+                summary=' '.join(rng.choices(vocabulary, k=20)),
+                content=' '.join(rng.choices(vocabulary, k=words)),
+                tags=','.join(rng.choices(WORDS, k=3)),
+                image_url='https://example.com/image.png',
+            ))
+            if len(batch) == 1000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+        article_index.rebuild()
+
+    def _legacy(self, query, limit):
+        return list(Article.objects.filter(
+            Q(title__icontains=query) |
+            Q(summary__icontains=query) |
+            Q(content__icontains=query) |
+            Q(tags__icontains=query)
+        ).distinct()[:limit])
+
+    def _fts(self, query, limit):
+        hits = article_index.search(query, limit=limit)
+        return list(Article.objects.filter(pk__in=[hit.pk for hit in hits]))
+
+    def _measure(self, run, queries):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _report(self, label, timings):
+        cuts = statistics.quantiles(timings, n=100)
+        self.stdout.write(f'  {label:<10} p50={cuts[49]:8.2f}ms  p95={cuts[94]:8.2f}ms')
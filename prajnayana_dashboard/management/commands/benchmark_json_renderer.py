@@ -0,0 +1,90 @@
+import datetime
+import io
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from authentication_app.models import User
+from backend import renderers
+from backend.renderers import FastJSONParser, FastJSONRenderer
+from coaching_app.models import Coach, Reservation
+from coaching_app.serializers import ReservationSerializer
+from prajnayana_dashboard.models import Article, JournalEntry
+from prajnayana_dashboard.serializers import ArticleSerializer, JournalEntrySerializer
+
+TEXT = 'Noticing the breath brings attention back to the present moment, gently and without judgement. '
+
+
+class Command(BaseCommand):
+    help = 'Compares render and parse time of the stdlib JSON renderer/parser against backend.renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per payload')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, both sides use the stdlib'))
+
+        # Everything happens inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            payloads = self._payloads(options['rows'])
+            transaction.set_rollback(True)
+
+        for label, data in payloads:
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                raise CommandError(f'{label}: the renderers disagree')
+            self.stdout.write(f'{label}: {options["rows"]} rows, {len(body) / 1024:.0f} KiB')
+            self._compare('render', options['repeat'],
+                          lambda: JSONRenderer().render(data), lambda: FastJSONRenderer().render(data))
+            self._compare('parse', options['repeat'],
+                          lambda: JSONParser().parse(io.BytesIO(body)), lambda: FastJSONParser().parse(io.BytesIO(body)))
+
+    def _payloads(self, rows):
+        users = User.objects.bulk_create([User(username=f'benchmark{i}') for i in range(rows + 1)])
+        coaches = Coach.objects.bulk_create([
+            Coach(user=user, bio=TEXT, specialization='Mindfulness', hourly_rate=Decimal('49.50'),
+                  available_days='Monday,Wednesday,Friday')
+            for user in users[1:11]
+        ])
+        Reservation.objects.bulk_create([
+            Reservation(user=users[0], coach=coaches[i % len(coaches)],
+                        date=datetime.date(2030, 1, 7) + datetime.timedelta(days=i), time_slot='9-10')
+            for i in range(rows)
+        ])
+        JournalEntry.objects.bulk_create([
+            JournalEntry(user=users[0], mood='Happy', content=TEXT * 5) for _ in range(rows)
+        ])
+        Article.objects.bulk_create([
+            Article(title=f'Article {i}', summary=TEXT, content=TEXT * 30, tags='calm,sleep',
+                    image_url='https://example.com/image.png')
+            for i in range(rows)
+        ])
+        return [
+            ('articles', ArticleSerializer(Article.objects.all(), many=True).data),
+            ('journal', JournalEntrySerializer(JournalEntry.objects.select_related('user'), many=True).data),
+            ('reservations', ReservationSerializer(
+                Reservation.objects.select_related('user', 'coach__user'), many=True,
+            ).data),
+        ]
+
+    def _compare(self, label, repeat, stdlib, fast):
+        before, after = self._measure(stdlib, repeat), self._measure(fast, repeat)
+        self.stdout.write(
+            f'  {label:<7} stdlib={before:8.2f}ms  fast={after:8.2f}ms  speedup={before / after:5.1f}x'
+        )
+
+    def _measure(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
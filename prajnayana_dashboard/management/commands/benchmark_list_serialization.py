@@ -0,0 +1,81 @@
+import datetime
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from authentication_app.models import User
+from backend.fastpath import compile_serializer
+from coaching_app.models import Coach, Reservation
+from coaching_app.serializers import ReservationSerializer
+from prajnayana_dashboard.models import Article, Habits, HabitTracking, JournalEntry
+from prajnayana_dashboard.serializers import ArticleListSerializer, HabitTrackingSerializer, JournalEntrySerializer
+
+TEXT = 'Noticing the breath brings attention back to the present moment, gently and without judgement. '
+
+
+class Command(BaseCommand):
+    help = 'Compares list serialization through the DRF serializers against the backend.fastpath compiled rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per list')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        # Everything happens inside a transaction that is rolled back at the end
+        with transaction.atomic():
+            for label, serializer_class, queryset in self._lists(options['rows']):
+                compiled = compile_serializer(serializer_class)
+                slow = lambda: serializer_class(queryset.all(), many=True).data  # noqa: E731
+                fast = lambda: compiled(queryset.values(*compiled.columns))  # noqa: E731
+                if list(slow()) != fast():
+                    raise CommandError(f'{label}: the fast path disagrees with {serializer_class.__name__}')
+                before = self._measure(slow, options['repeat'])
+                after = self._measure(fast, options['repeat'])
+                self.stdout.write(
+                    f'{label:<15} {options["rows"]} rows  serializer={before:8.2f}ms  '
+                    f'fast={after:8.2f}ms  speedup={before / after:5.1f}x'
+                )
+            transaction.set_rollback(True)
+
+    def _lists(self, rows):
+        user = User.objects.create(username='benchmark', first_name='Bench')
+        coaches = [
+            Coach.objects.create(user=User.objects.create(username=f'coach{i}'), bio=TEXT, specialization='Sleep',
+                                 hourly_rate=Decimal('49.50'), available_days='Monday,Wednesday,Friday')
+            for i in range(10)
+        ]
+        habits = Habits.objects.bulk_create([Habits(habit=f'Habit {i}', description=TEXT, user=user) for i in range(10)])
+        start = datetime.date(2030, 1, 1)
+        Reservation.objects.bulk_create([
+            Reservation(user=user, coach=coaches[i % 10], date=start + datetime.timedelta(days=i), time_slot='9-10')
+            for i in range(rows)
+        ])
+        HabitTracking.objects.bulk_create([
+            HabitTracking(user=user, habit=habits[i % 10], date=start + datetime.timedelta(days=i // 10), is_done=i % 2)
+            for i in range(rows)
+        ])
+        JournalEntry.objects.bulk_create([JournalEntry(user=user, mood='Happy', content=TEXT) for _ in range(rows)])
+        Article.objects.bulk_create([
+            Article(title=f'Article {i}', summary=TEXT, content=TEXT, tags='calm', image_url='https://example.com/a.png')
+            for i in range(rows)
+        ])
+        return [
+            ('reservations', ReservationSerializer,
+             Reservation.objects.filter(user=user).select_related('user', 'coach__user').order_by('date', 'id')),
+            ('habit tracking', HabitTrackingSerializer,
+             HabitTracking.objects.filter(user=user).select_related('user', 'habit__user').order_by('-date', 'id')),
+            ('journal', JournalEntrySerializer,
+             JournalEntry.objects.filter(user=user).select_related('user').order_by('-timestamp', 'id')),
+            ('articles', ArticleListSerializer, Article.objects.order_by('id')),
+        ]
+
+    def _measure(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from prajnayana_dashboard import insights
+
+
+class Command(BaseCommand):
+    help = 'Generates missing or out-of-date article insights; safe to interrupt and rerun'
+
+    def add_arguments(self, parser):
+        parser.add_argument('article_ids', nargs='*', type=int, help='Only these articles (default: all)')
+        parser.add_argument('--workers', type=int, default=4, help='Generations in flight at once')
+        parser.add_argument('--force', action='store_true', help='Regenerate even if insights are current')
+        parser.add_argument('--provider', help='Dotted path of the provider class (default: ARTICLE_INSIGHT_PROVIDER)')
+
+    def handle(self, *args, **options):
+        provider = None
+        if options['provider']:
+            try:
+                provider = import_string(options['provider'])()
+            except ImportError as e:
+                raise CommandError(str(e))
+
+        def progress(article_id, outcome):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Article {article_id}: {outcome}')
+
+        outcomes = insights.precompute(
+            options['article_ids'], workers=options['workers'], force=options['force'],
+            provider=provider, progress=progress,
+        )
+        summary = f"Computed {outcomes['computed']}, skipped {outcomes['skipped']}, failed {outcomes['failed']}"
+        if outcomes['failed']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from prajnayana_dashboard import streaks
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every habit streak summary from the tracking history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = streaks.rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} habit streaks'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from prajnayana_dashboard.search import article_index, journal_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the article and journal full-text indexes (needed on SQLite after bulk imports)'
+
+    def handle(self, *args, **options):
+        if not article_index.is_available():
+            self.stdout.write(self.style.WARNING('No full-text index on this database, nothing to rebuild'))
+            return
+        article_index.rebuild()
+        journal_index.rebuild()
+        self.stdout.write(self.style.SUCCESS('Article and journal search indexes rebuilt'))
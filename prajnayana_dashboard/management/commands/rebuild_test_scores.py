@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from prajnayana_dashboard.models import QuestionaireUserResponse, TestSession
+
+
+class Command(BaseCommand):
+    help = 'Verifies stored test session scores against their responses and repairs any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--check', action='store_true', help='Only report mismatches, do not fix them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = mismatched = 0
+        last_id = 0
+
+        while True:
+            sessions = list(
+                TestSession.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'score')[:batch_size]
+            )
+            if not sessions:
+                break
+            last_id = sessions[-1][0]
+
+            totals = dict(
+                QuestionaireUserResponse.objects.filter(test_session_id__in=[pk for pk, _ in sessions])
+                .values('test_session_id')
+                .annotate(total=Sum(QuestionaireUserResponse.numeric_score_expression()))
+                .values_list('test_session_id', 'total')
+            )
+            stale = [
+                TestSession(pk=pk, score=totals.get(pk, 0))
+                for pk, score in sessions
+                if (score or 0) != totals.get(pk, 0)
+            ]
+            checked += len(sessions)
+            mismatched += len(stale)
+            if stale and not options['check']:
+                TestSession.objects.bulk_update(stale, ['score'])
+
+        if options['check'] and mismatched:
+            raise CommandError(f'{mismatched} of {checked} test session scores are out of date')
+        action = 'found' if options['check'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} test sessions, {action} {mismatched}'))
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Must stay identical to ``article_index.document_sql()`` in search.py,
+# otherwise PostgreSQL will not pick the index for search queries.
+ARTICLE_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(\"title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"summary\", '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"content\", '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(\"tags\", '')), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS prajnayana_dashboard_article_fts "
+            "USING fts5(title, summary, content, tags, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO prajnayana_dashboard_article_fts (rowid, title, summary, content, tags) "
+            "SELECT id, coalesce(title, ''), coalesce(summary, ''), coalesce(content, ''), coalesce(tags, '') "
+            "FROM prajnayana_dashboard_article"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS prajnayana_article_search_idx "
+            f"ON prajnayana_dashboard_article USING GIN (({ARTICLE_DOCUMENT}))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS prajnayana_dashboard_article_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS prajnayana_article_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0014_book'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
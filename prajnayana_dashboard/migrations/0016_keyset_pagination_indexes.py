@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0015_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='habittracking',
+            index=models.Index(fields=['user', '-date', 'id'], name='habittracking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', '-timestamp', 'id'], name='journal_user_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(fields=['user', '-date_taken', '-id'], name='testsession_user_taken_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visionboard',
+            index=models.Index(fields=['user', 'id'], name='visionboard_user_id_idx'),
+        ),
+    ]
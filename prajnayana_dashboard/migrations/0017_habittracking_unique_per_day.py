@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:48
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def merge_duplicate_tracking(apps, schema_editor):
+    """Collapse repeated (user, habit, date) rows into the newest one, done if any was done."""
+    HabitTracking = apps.get_model('prajnayana_dashboard', 'HabitTracking')
+    duplicates = (
+        HabitTracking.objects.values('user', 'habit', 'date')
+        .annotate(rows=Count('id'), keep=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        rows = HabitTracking.objects.filter(user=group['user'], habit=group['habit'], date=group['date'])
+        is_done = rows.filter(is_done=True).exists()
+        rows.exclude(id=group['keep']).delete()
+        HabitTracking.objects.filter(id=group['keep']).update(is_done=is_done)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0016_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tracking, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='habittracking',
+            constraint=models.UniqueConstraint(fields=('user', 'habit', 'date'), name='unique_habit_tracking_per_day'),
+        ),
+    ]
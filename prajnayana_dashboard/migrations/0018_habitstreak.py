@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('prajnayana_dashboard', '0017_habittracking_unique_per_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitStreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('streak_length', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_done_date', models.DateField(blank=True, null=True)),
+                ('done_last_7_days', models.PositiveSmallIntegerField(default=0)),
+                ('done_last_30_days', models.PositiveSmallIntegerField(default=0)),
+                ('computed_on', models.DateField()),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='streaks', to='prajnayana_dashboard.habits')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='habit_streaks', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='habitstreak',
+            constraint=models.UniqueConstraint(fields=('user', 'habit'), name='unique_habit_streak'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Must stay identical to ``journal_index.document_sql()`` in search.py,
+# otherwise PostgreSQL will not pick the index for search queries.
+JOURNAL_DOCUMENT = "setweight(to_tsvector('english', coalesce(\"content\", '')), 'A')"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS prajnayana_dashboard_journalentry_fts "
+            "USING fts5(content, user_id, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO prajnayana_dashboard_journalentry_fts (rowid, content, user_id) "
+            "SELECT id, coalesce(content, ''), user_id FROM prajnayana_dashboard_journalentry"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS prajnayana_journal_search_idx "
+            f"ON prajnayana_dashboard_journalentry USING GIN (({JOURNAL_DOCUMENT}))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS prajnayana_dashboard_journalentry_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS prajnayana_journal_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0018_habitstreak'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
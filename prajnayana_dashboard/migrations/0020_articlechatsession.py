@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('prajnayana_dashboard', '0019_journalentry_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleChatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages', models.JSONField(blank=True, default=list)),
+                ('summary', models.TextField(blank=True, default='')),
+                ('summarized_messages', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_sessions', to='prajnayana_dashboard.article')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_chats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='articlechat_user_id_idx')],
+            },
+        ),
+    ]
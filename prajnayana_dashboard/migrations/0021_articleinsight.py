@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0020_articlechatsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('ready', 'Ready'), ('stale', 'Stale'), ('failed', 'Failed')], default='ready', max_length=10)),
+                ('provider', models.CharField(max_length=100)),
+                ('summary', models.TextField(blank=True, default='')),
+                ('key_terms', models.JSONField(blank=True, default=list)),
+                ('reflective_questions', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='insight', to='prajnayana_dashboard.article')),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+def normalize(name):
+    return " ".join(name.split()).lower()[:100]
+
+
+def backfill_tags(apps, schema_editor):
+    """Split every article's comma-separated tags into Tag rows and links."""
+    Article = apps.get_model('prajnayana_dashboard', 'Article')
+    Tag = apps.get_model('prajnayana_dashboard', 'Tag')
+    Link = Article.normalized_tags.through
+
+    article_tags = {}
+    for pk, raw in Article.objects.exclude(tags__isnull=True).exclude(tags='').values_list('id', 'tags').iterator():
+        names = (normalize(name) for name in raw.split(','))
+        article_tags[pk] = list(dict.fromkeys(name for name in names if name))
+
+    names = {name for tag_names in article_tags.values() for name in tag_names}
+    Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True, batch_size=500)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    Link.objects.bulk_create(
+        [Link(article_id=pk, tag_id=tag_ids[name]) for pk, tag_names in article_tags.items() for name in tag_names],
+        ignore_conflicts=True, batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0021_articleinsight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='articles', to='prajnayana_dashboard.tag'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
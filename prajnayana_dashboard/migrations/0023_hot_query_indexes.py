@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:25
+
+from django.db import migrations, models
+import django.db.models.functions.datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0022_article_normalized_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalentry',
+            index=models.Index(fields=['user', 'date', '-timestamp'], name='journal_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsession',
+            index=models.Index(models.F('user'), django.db.models.functions.datetime.TruncDate('date_taken'), name='testsession_user_day_idx'),
+        ),
+    ]
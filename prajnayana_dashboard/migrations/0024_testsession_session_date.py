@@ -0,0 +1,59 @@
+# Generated by Django 4.2.17 on 2026-10-18 13:28
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.utils.timezone
+
+
+def backfill_session_dates(apps, schema_editor):
+    """
+    Give every session the local day it was taken on. Where a user already has
+    several sessions on one day the earliest keeps the date and the later ones
+    stay null, so the unique constraint can be added.
+    """
+    TestSession = apps.get_model('prajnayana_dashboard', 'TestSession')
+    rows = TestSession.objects.order_by('user_id', 'date_taken', 'id').values_list('id', 'user_id', 'date_taken')
+    previous = None
+    batch = []
+    for pk, user_id, date_taken in rows.iterator(chunk_size=2000):
+        # Sessions of one user and day are adjacent in this ordering
+        key = (user_id, timezone.localdate(date_taken))
+        if key == previous:
+            continue
+        previous = key
+        batch.append(TestSession(pk=pk, session_date=key[1]))
+        if len(batch) == 1000:
+            TestSession.objects.bulk_update(batch, ['session_date'])
+            batch = []
+    TestSession.objects.bulk_update(batch, ['session_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prajnayana_dashboard', '0023_hot_query_indexes'),
+    ]
+
+    operations = [
+        # The daily check now probes (user, session_date), nothing casts date_taken
+        migrations.RemoveIndex(
+            model_name='testsession',
+            name='testsession_user_day_idx',
+        ),
+        # Added without the default first, which would date every existing row today
+        migrations.AddField(
+            model_name='testsession',
+            name='session_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_session_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='testsession',
+            name='session_date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='testsession',
+            constraint=models.UniqueConstraint(fields=('user', 'session_date'), name='unique_test_session_per_day'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
 from authentication_app.models import User
 from django.utils import timezone
 
@@ -12,21 +14,48 @@ class TestSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     score = models.IntegerField(default=None,null=True,blank=True)
     date_taken = models.DateTimeField(auto_now_add=True)
+    # The local day the session belongs to; one session per user and day.
+    # Null only on duplicates that predate the constraint.
+    session_date = models.DateField(default=timezone.localdate, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date_taken', '-id'], name='testsession_user_taken_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'session_date'], name='unique_test_session_per_day'),
+        ]
+
+    @classmethod
+    def get_or_create_today(cls, user, **defaults):
+        """
+        Today's session for ``user``, created with ``defaults`` if there is none:
+        ``(session, created)``. One probe of the unique index, and concurrent
+        callers all get the same session: whoever loses the insert reads the
+        winner's row.
+        """
+        return cls.objects.get_or_create(user=user, session_date=timezone.localdate(), defaults=defaults)
 
 
     def __str__(self):
         return f"Test for {self.user.username} on {self.date_taken}"
     
     def calculate_score(self):
-        """Calculate the score based on the user's responses."""
-        responses = QuestionaireUserResponse.objects.filter(test_session=self)
-        total_score = sum(response.get_numeric_score() for response in responses)
-        return total_score
+        """Calculate the score based on the user's responses, summed in the database."""
+        total_score = self.responses.aggregate(
+            total=Sum(QuestionaireUserResponse.numeric_score_expression())
+        )['total']
+        return total_score or 0
 
     def update_score(self):
-        """Update the score field for the test session."""
+        """Recompute the score field from scratch, e.g. to repair drift."""
         self.score = self.calculate_score()
-        self.save()
+        TestSession.objects.filter(pk=self.pk).update(score=self.score)
+
+    def add_to_score(self, delta):
+        """Atomically shift the stored score by delta without reading the responses."""
+        if delta:
+            TestSession.objects.filter(pk=self.pk).update(score=Coalesce(F('score'), 0) + delta)
 
 class QuestionaireUserResponse(models.Model):
     LIKERT_CHOICES = [
@@ -41,16 +70,38 @@ class QuestionaireUserResponse(models.Model):
     question = models.ForeignKey(DiscoveryQuestion, on_delete=models.CASCADE)
     selected_option = models.CharField(max_length=1, choices=LIKERT_CHOICES)
 
+    SCORE_MAP = {
+        '1': 1,  # Disagree
+        '2': 2,  # Somewhat Disagree
+        '3': 3,  # Neither Agree nor Disagree
+        '4': 4,  # Somewhat Agree
+        '5': 5,  # Agree
+    }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored answer so a later save can apply only the difference
+        instance._stored_option = instance.__dict__.get('selected_option')
+        instance._stored_session_id = instance.__dict__.get('test_session_id')
+        return instance
+
+    @classmethod
+    def numeric_score(cls, option):
+        return cls.SCORE_MAP.get(option, 1)
+
+    @classmethod
+    def numeric_score_expression(cls):
+        """SQL equivalent of get_numeric_score, for aggregating in the database."""
+        return Case(
+            *[When(selected_option=option, then=Value(score)) for option, score in cls.SCORE_MAP.items()],
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+
     def get_numeric_score(self):
         """Return the numeric value corresponding to the selected option."""
-        score_map = {
-            '1': 1,  # Disagree
-            '2': 2,  # Somewhat Disagree
-            '3': 3,  # Neither Agree nor Disagree
-            '4': 4,  # Somewhat Agree
-            '5': 5,  # Agree
-        }
-        return score_map.get(self.selected_option, 1)
+        return self.numeric_score(self.selected_option)
 
     def __str__(self):
         return f"{self.test_session.user.username} - {self.question.text} - {self.get_selected_option_display()}"
@@ -72,9 +123,69 @@ class HabitTracking(models.Model):
 
 
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored state, so the streak engine can tell what a later save changed
+        instance._stored_state = (
+            instance.__dict__.get('habit_id'), instance.__dict__.get('date'), instance.__dict__.get('is_done'),
+        )
+        return instance
+
     def __str__(self):
         return f" {self.habit.habit}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', 'id'], name='habittracking_user_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'habit', 'date'], name='unique_habit_tracking_per_day'),
+        ]
+
+
+class HabitStreak(models.Model):
+    """
+    Precomputed streak figures for one user's habit, maintained by streaks.py.
+
+    ``streak_length`` is the run of consecutive done days ending on
+    ``last_done_date``; it only counts as the current streak while that date is
+    today or yesterday. The 7/30 day counts are for the windows ending on
+    ``computed_on``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='habit_streaks')
+    habit = models.ForeignKey(Habits, on_delete=models.CASCADE, related_name='streaks')
+    streak_length = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_done_date = models.DateField(null=True, blank=True)
+    done_last_7_days = models.PositiveSmallIntegerField(default=0)
+    done_last_30_days = models.PositiveSmallIntegerField(default=0)
+    computed_on = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'habit'], name='unique_habit_streak'),
+        ]
+
+    def __str__(self):
+        return f"{self.habit} streak for {self.user}"
+
+    @property
+    def current_streak(self):
+        if self.last_done_date is None:
+            return 0
+        if (self.computed_on - self.last_done_date).days > 1:
+            return 0
+        return self.streak_length
+
+    @property
+    def completion_rate_7d(self):
+        return round(self.done_last_7_days / 7, 4)
+
+    @property
+    def completion_rate_30d(self):
+        return round(self.done_last_30_days / 30, 4)
+
 
 class JournalEntry(models.Model):
     MOOD_CHOICES = [
@@ -94,6 +205,12 @@ class JournalEntry(models.Model):
     def __str__(self):
         return f"Journal ({self.mood}) by {self.user} on {self.date} at {self.timestamp.time()}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-timestamp', 'id'], name='journal_user_timestamp_idx'),
+            models.Index(fields=['user', 'date', '-timestamp'], name='journal_user_date_idx'),
+        ]
+
 class KnowledgeHubCategory(models.TextChoices):
     MINDFULNESS_TECHNIQUES = "Mindfulness Techniques"
     EMOTIONAL_RESILIENCE = "Emotional Resilience"
@@ -113,6 +230,24 @@ class KnowledgeHub(models.Model): # Also knows as article
         return self.title
     
     
+class Tag(models.Model):
+    """A normalized article tag, derived from ``Article.tags``."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(name.split()).lower()[:100]
+
+    @classmethod
+    def parse(cls, raw):
+        """Distinct normalized names from a comma-separated tag string, in order."""
+        names = (cls.normalize(name) for name in (raw or "").split(","))
+        return list(dict.fromkeys(name for name in names if name))
+
+
 class Article(models.Model):
     title = models.CharField(max_length=255)
     summary=models.TextField()
@@ -124,12 +259,73 @@ class Article(models.Model):
     image_url = models.URLField()
     knowledgehub = models.ForeignKey(KnowledgeHub,null=True,on_delete=models.SET_NULL)
     tags = models.CharField(max_length=300,null=True,blank=True)
+    # Kept in sync with ``tags`` on save, for indexed filtering and facets
+    normalized_tags = models.ManyToManyField(Tag, related_name='articles', blank=True, editable=False)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_tags = instance.__dict__.get('tags')
+        return instance
+
+    def sync_normalized_tags(self):
+        names = Tag.parse(self.tags)
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        self.normalized_tags.set(Tag.objects.filter(name__in=names))
+        self._stored_tags = self.tags
+
+
+class ArticleInsightStatus(models.TextChoices):
+    READY = "ready"
+    STALE = "stale"
+    FAILED = "failed"
+
+
+class ArticleInsight(models.Model):
+    """
+    LLM artifacts precomputed for an article by insights.py. ``content_hash``
+    identifies the article text and provider they were generated from; the
+    row goes stale when the article changes.
+    """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, related_name='insight')
+    content_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=ArticleInsightStatus.choices, default=ArticleInsightStatus.READY)
+    provider = models.CharField(max_length=100)
+    summary = models.TextField(blank=True, default='')
+    key_terms = models.JSONField(default=list, blank=True)
+    reflective_questions = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
 
-    
+    def __str__(self):
+        return f"Insights for {self.article} ({self.status})"
+
+
+class ArticleChatSession(models.Model):
+    """
+    A conversation with the article assistant, kept server-side so clients
+    only send the new question. ``messages`` holds every user/assistant turn;
+    the first ``summarized_messages`` of them are no longer sent upstream and
+    are represented by ``summary`` instead.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='article_chats')
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='chat_sessions')
+    messages = models.JSONField(default=list, blank=True)
+    summary = models.TextField(blank=True, default='')
+    summarized_messages = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='articlechat_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Chat about {self.article} by {self.user}"
 
 
 class VisionBoardCategory(models.TextChoices):
@@ -149,6 +345,11 @@ class VisionBoard(models.Model):
     def __str__(self):
         return f"Vision Board by {self.user.username}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='visionboard_user_id_idx'),
+        ]
+
 
 class BookRecommendatioCategory(models.TextChoices):
     AFFIRMATIONS = "Affirmation"
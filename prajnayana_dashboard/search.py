@@ -0,0 +1,203 @@
+"""
+Full-text search for the text-heavy models.
+
+SQLite uses an FTS5 virtual table that mirrors the indexed columns (rowid is
+the model's primary key) and is kept in sync from signals. PostgreSQL uses a
+GIN index over a weighted ``tsvector`` expression, which the database keeps
+current by itself. On any other backend ``search`` returns ``None`` and the
+caller falls back to plain ``icontains`` filtering.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+
+from .models import Article, JournalEntry
+
+SearchHit = namedtuple('SearchHit', ['pk', 'rank', 'snippet'])
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+MAX_TERMS = 8
+
+# tsvector weight -> bm25 column weight
+BM25_WEIGHTS = {'A': 10.0, 'B': 5.0, 'C': 2.0, 'D': 1.0}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into at most MAX_TERMS lowercase word tokens."""
+    return _TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class FullTextIndex:
+    """
+    Describes the full-text index of one model.
+
+    ``columns`` is a list of ``(column, weight)`` pairs, weight being a
+    PostgreSQL tsvector weight (A-D). ``snippet_column`` is the column the
+    highlighted snippet is cut from and ``scope_column`` an optional integer
+    column (e.g. ``user_id``) that every search must be restricted to.
+    """
+
+    def __init__(self, model, columns, snippet_column, scope_column=None, config='english'):
+        self.model = model
+        self.columns = columns
+        self.snippet_column = snippet_column
+        self.scope_column = scope_column
+        self.config = config
+        self._available = {}
+
+    @property
+    def base_table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f'{self.base_table}_fts'
+
+    @property
+    def column_names(self):
+        return [column for column, _ in self.columns]
+
+    def document_sql(self):
+        """The tsvector expression the PostgreSQL GIN index is built on."""
+        return ' || '.join(
+            f"setweight(to_tsvector('{self.config}', coalesce(\"{column}\", '')), '{weight}')"
+            for column, weight in self.columns
+        )
+
+    def is_available(self):
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            return True
+        if vendor != 'sqlite':
+            return False
+        if connection.alias not in self._available:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [self.fts_table],
+                )
+                self._available[connection.alias] = cursor.fetchone() is not None
+        return self._available[connection.alias]
+
+    # -- keeping the SQLite mirror in sync ---------------------------------
+
+    def _fts_columns(self):
+        columns = self.column_names
+        if self.scope_column:
+            columns = columns + [self.scope_column]
+        return columns
+
+    def sync(self, instance):
+        """Write ``instance`` into the FTS5 table (no-op outside SQLite)."""
+        if connection.vendor != 'sqlite' or not self.is_available():
+            return
+        columns = self._fts_columns()
+        values = [getattr(instance, column) or '' for column in columns]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.fts_table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f"INSERT INTO {self.fts_table} (rowid, {', '.join(columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(columns))})",
+                [instance.pk] + values,
+            )
+
+    def remove(self, pk):
+        if connection.vendor != 'sqlite' or not self.is_available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.fts_table} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        """Repopulate the FTS5 table from the base table, e.g. after bulk loads."""
+        if connection.vendor != 'sqlite' or not self.is_available():
+            return
+        columns = self._fts_columns()
+        selects = ', '.join(f"coalesce({c}, '')" for c in columns)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.fts_table}')
+            cursor.execute(
+                f"INSERT INTO {self.fts_table} (rowid, {', '.join(columns)}) "
+                f"SELECT id, {selects} FROM {self.base_table}"
+            )
+
+    # -- querying -------------------------------------------------------------
+
+    def search(self, query, scope=None, limit=50, offset=0):
+        """
+        Return ranked ``SearchHit``s (best first) for ``query``, or ``None``
+        when the current database has no full-text index to use.
+
+        Every term is prefix-matched and all terms must be present.
+        """
+        if not self.is_available():
+            return None
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if connection.vendor == 'sqlite':
+            return self._search_sqlite(terms, scope, limit, offset)
+        return self._search_postgres(terms, scope, limit, offset)
+
+    def _search_sqlite(self, terms, scope, limit, offset):
+        # Every term is limited to the text columns, or a numeric term would
+        # also prefix-match the scope column
+        columns = ' '.join(self.column_names)
+        match = ' '.join(f'{{{columns}}}:"{term}"*' for term in terms)
+        weights = [str(BM25_WEIGHTS[weight]) for _, weight in self.columns]
+        if self.scope_column:
+            # The scope is an indexed column too, so FTS5 intersects its
+            # posting list with the terms instead of filtering every match.
+            match = f'{self.scope_column}:"{int(scope)}" {match}'
+            weights.append('0.0')
+        snippet_index = self.column_names.index(self.snippet_column)
+        sql = (
+            f"SELECT rowid, bm25({self.fts_table}, {', '.join(weights)}) AS rank, "
+            f"snippet({self.fts_table}, {snippet_index}, %s, %s, '…', 16) "
+            f"FROM {self.fts_table} WHERE {self.fts_table} MATCH %s "
+            f"ORDER BY rank LIMIT %s OFFSET %s"
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_END, match, limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # bm25 is "lower is better"; flip it so every backend ranks descending.
+        return [SearchHit(pk, -rank, snippet) for pk, rank, snippet in rows]
+
+    def _search_postgres(self, terms, scope, limit, offset):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        where = f'({self.document_sql()}) @@ q'
+        params = [tsquery]
+        if self.scope_column:
+            where += f' AND "{self.scope_column}" = %s'
+            params.append(scope)
+        headline_options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=24, MinWords=8'
+        sql = (
+            f"SELECT hit.id, hit.rank, ts_headline('{self.config}', coalesce(t.\"{self.snippet_column}\", ''), "
+            f"hit.q, %s) "
+            f"FROM (SELECT id, q, ts_rank({self.document_sql()}, q) AS rank "
+            f"      FROM {self.base_table}, to_tsquery('{self.config}', %s) q "
+            f"      WHERE {where} ORDER BY rank DESC, id LIMIT %s OFFSET %s) hit "
+            f"JOIN {self.base_table} t ON t.id = hit.id "
+            f"ORDER BY hit.rank DESC, hit.id"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [headline_options] + params + [limit, offset])
+            return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+article_index = FullTextIndex(
+    Article,
+    columns=[('title', 'A'), ('summary', 'B'), ('content', 'C'), ('tags', 'B')],
+    snippet_column='content',
+)
+
+journal_index = FullTextIndex(
+    JournalEntry,
+    columns=[('content', 'A')],
+    snippet_column='content',
+    scope_column='user_id',
+)
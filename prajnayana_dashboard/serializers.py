@@ -1,6 +1,12 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import serializers
 from .models import *
+from . import streaks
 from authentication_app.serializers import UserSerializer
+from backend.versioning import invalidate
+from backend.fieldsets import SparseFieldsetMixin
 
 class DiscoveryQuestionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -41,30 +47,105 @@ class QuestionaireUserResponseSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        res = QuestionaireUserResponse.objects.create(**validated_data)
-        res.test_session.update_score()
-        return res
+        # The session score is adjusted by the post_save signal
+        return QuestionaireUserResponse.objects.create(**validated_data)
     
+class QuestionaireAnswerSerializer(serializers.Serializer):
+    question_id = serializers.IntegerField()
+    # Index into LIKERT_CHOICES, 0 = Disagree ... 4 = Agree
+    selected_option = serializers.IntegerField(min_value=0, max_value=len(QuestionaireUserResponse.LIKERT_CHOICES) - 1)
+
+
+class QuestionaireSubmissionSerializer(serializers.Serializer):
+    """A whole questionnaire, validated and stored in one go."""
+    max_responses = 200
+
+    responses = QuestionaireAnswerSerializer(many=True, allow_empty=False)
+
+    def validate_responses(self, responses):
+        if len(responses) > self.max_responses:
+            raise serializers.ValidationError(f"At most {self.max_responses} responses can be submitted at once.")
+
+        question_ids = [response['question_id'] for response in responses]
+        if len(set(question_ids)) != len(question_ids):
+            raise serializers.ValidationError("Each question can only be answered once.")
+
+        questions = DiscoveryQuestion.objects.in_bulk(question_ids)
+        missing = [question_id for question_id in question_ids if question_id not in questions]
+        if missing:
+            raise serializers.ValidationError(f"Unknown question ids: {missing}")
+
+        for response in responses:
+            response['selected_option'] = QuestionaireUserResponse.LIKERT_CHOICES[response['selected_option']][0]
+        return responses
+
+    def create(self, validated_data):
+        """
+        Store the answers on today's session. If that session already has
+        answers nothing is stored and it is returned as is, with
+        ``submitted`` False.
+        """
+        responses = validated_data['responses']
+        score = sum(QuestionaireUserResponse.numeric_score(response['selected_option']) for response in responses)
+        with transaction.atomic():
+            test_session, created = TestSession.get_or_create_today(validated_data['user'], score=score)
+            if not created:
+                # Serialize concurrent submissions for a session started empty
+                test_session = TestSession.objects.select_for_update().get(pk=test_session.pk)
+                if test_session.responses.exists():
+                    self.submitted = False
+                    return test_session
+                test_session.score = score
+                test_session.save(update_fields=['score'])
+            self.submitted = True
+            # bulk_create skips the scoring signals, the score above is already final
+            QuestionaireUserResponse.objects.bulk_create([
+                QuestionaireUserResponse(
+                    test_session=test_session,
+                    question_id=response['question_id'],
+                    selected_option=response['selected_option'],
+                )
+                for response in responses
+            ])
+        return test_session
+
+
 class HabitsSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
+
+    # List fast path (backend.fastpath) mirror of the string user
+    fast_fields = {'user': (['user__username'], lambda username: username)}
     
     class Meta:
         model = Habits
         fields = ['id', 'habit','description' ,'user']
 
+def validate_check_in_date(value):
+    # A day ahead would count as a live streak until that day came
+    if value > timezone.localdate():
+        raise serializers.ValidationError("Habits cannot be checked in for a future date.")
+    return value
+
+
 class HabitTrackingSerializer(serializers.ModelSerializer):
     habit_id = serializers.IntegerField(write_only=True)  
-    date = serializers.DateField(format="%Y-%m-%d", required=False)
+    date = serializers.DateField(format="%Y-%m-%d", required=False, validators=[validate_check_in_date])
     user = serializers.StringRelatedField(read_only=True)
     habit = HabitsSerializer(read_only=True)  
 
+    fast_fields = {'user': (['user__username'], lambda username: username)}
+
     class Meta:
         model = HabitTracking
         fields = ['id', 'user', 'habit', 'habit_id', 'date', 'is_done']
 
     def validate(self, attrs):
-        habit_id = attrs.pop("habit_id")  
-        habit = Habits.objects.filter(id=habit_id).first()  
+        habit_id = attrs.pop("habit_id", None)
+        if habit_id is None and self.instance is not None:
+            # A partial update keeps the tracked habit
+            habit = self.instance.habit
+        else:
+            habit = Habits.objects.filter(id=habit_id).first()
 
         if not habit:
             raise serializers.ValidationError("Habit not found.")
@@ -75,17 +156,103 @@ class HabitTrackingSerializer(serializers.ModelSerializer):
         if attrs.get("user") is None:
             attrs["user"] = self.context["request"].user
 
+        # create() upserts, but an update that moves the row onto a day the
+        # habit is already tracked on would break the one-row-per-day constraint
+        if self.instance is not None:
+            date = attrs.get("date", self.instance.date)
+            taken = HabitTracking.objects.filter(user=self.instance.user, habit=habit, date=date)
+            if taken.exclude(pk=self.instance.pk).exists():
+                raise serializers.ValidationError(f"This habit is already tracked on {date}.")
+
         attrs["habit"] = habit
         return attrs
 
     def create(self, validated_data):
         validated_data["user"] = self.context["request"].user
-        return super().create(validated_data)
+        # One row per habit and day, checking in again updates it
+        tracking, _ = HabitTracking.objects.update_or_create(
+            user=validated_data["user"],
+            habit=validated_data["habit"],
+            date=validated_data.get("date", timezone.localdate()),
+            defaults={"is_done": validated_data.get("is_done", False)},
+        )
+        return tracking
+
+
+class HabitCheckInSerializer(serializers.Serializer):
+    habit_id = serializers.IntegerField()
+    date = serializers.DateField(required=False, validators=[validate_check_in_date])
+    is_done = serializers.BooleanField(default=True)
+
+
+class HabitTrackingBulkSerializer(serializers.Serializer):
+    """Many habit check-ins at once, upserted on (user, habit, date)."""
+    max_items = 500
+
+    items = HabitCheckInSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.max_items:
+            raise serializers.ValidationError(f"At most {self.max_items} check-ins can be sent at once.")
+
+        today = timezone.localdate()
+        keys = set()
+        for item in items:
+            item.setdefault("date", today)
+            key = (item["habit_id"], item["date"])
+            if key in keys:
+                raise serializers.ValidationError(f"Habit {key[0]} is listed twice for {key[1]}.")
+            keys.add(key)
+
+        user = self.context["request"].user
+        habit_ids = {item["habit_id"] for item in items}
+        allowed = set(
+            Habits.objects.filter(Q(user=user) | Q(user__isnull=True), id__in=habit_ids).values_list("id", flat=True)
+        )
+        if habit_ids - allowed:
+            raise serializers.ValidationError(
+                f"Habits not found or not yours: {sorted(habit_ids - allowed)}"
+            )
+        return items
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        HabitTracking.objects.bulk_create(
+            [
+                HabitTracking(user=user, habit_id=item["habit_id"], date=item["date"], is_done=item["is_done"])
+                for item in validated_data["items"]
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "habit", "date"],
+            update_fields=["is_done"],
+        )
+        # bulk_create skips the signals that keep streaks and versions current
+        streaks.recompute(user.id, {item["habit_id"] for item in validated_data["items"]})
+        invalidate('habits', user.id)
+        return validated_data["items"]
+
+
+class HabitStreakSerializer(serializers.ModelSerializer):
+    habit = serializers.StringRelatedField()
+    current_streak = serializers.IntegerField(read_only=True)
+    completion_rate_7d = serializers.FloatField(read_only=True)
+    completion_rate_30d = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = HabitStreak
+        fields = ['habit_id', 'habit', 'current_streak', 'longest_streak', 'last_done_date',
+                  'completion_rate_7d', 'completion_rate_30d', 'computed_on']
     
 
 class JournalEntrySerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     date = serializers.SerializerMethodField()
+
+    fast_fields = {
+        'user': (['user__username'], lambda username: username),
+        'date': (['date'], lambda date: date if date else None),
+    }
+
     class Meta:
         model = JournalEntry
         fields = ["id", "user", "date", "timestamp", "mood", "content"]
@@ -99,19 +266,73 @@ class JournalEntrySerializer(serializers.ModelSerializer):
         return obj.date if obj.date else None
 
     
-class KnowledgeHubSerializer(serializers.ModelSerializer):
+class KnowledgeHubSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = KnowledgeHub
         fields = '__all__'
 
 
+class KnowledgeHubListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = KnowledgeHub
+        fields = ['id', 'title', 'level', 'image_url', 'date_added']
+
+
         
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     knowledgehub = KnowledgeHubSerializer(read_only=True)
 
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ['normalized_tags']
+
+    # Snippets only exist on search results, which skip the list fast path
+    fast_fields = {}
+    extra_fields = ('snippet',)
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        # Search results carry a highlighted excerpt of the matching content
+        snippets = self.context.get('search_snippets')
+        if snippets is not None and self.wants_field('snippet'):
+            ret['snippet'] = snippets.get(instance.pk)
+        return ret
+
+
+class ArticleListSerializer(ArticleSerializer):
+    """List rows without the article body or the nested hub."""
+    knowledgehub = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Article
+        fields = ['id', 'title', 'summary', 'level', 'image_url', 'tags', 'knowledgehub']
+
+class ArticleInsightSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArticleInsight
+        fields = ['summary', 'key_terms', 'reflective_questions', 'provider', 'updated_at']
+
+
+class ArticleChatSessionSerializer(serializers.ModelSerializer):
+    article_title = serializers.CharField(source='article.title', read_only=True)
+
+    class Meta:
+        model = ArticleChatSession
+        fields = ['id', 'article', 'article_title', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        attrs['user'] = self.context["request"].user
+        return attrs
+
+
+class ArticleChatSessionDetailSerializer(ArticleChatSessionSerializer):
+    class Meta(ArticleChatSessionSerializer.Meta):
+        fields = ArticleChatSessionSerializer.Meta.fields + ['summary', 'messages']
+        read_only_fields = ['summary', 'messages']
+
+
+class ArticleChatQuestionSerializer(serializers.Serializer):
+    question = serializers.CharField(max_length=4000)
 
 class VisionBoardSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
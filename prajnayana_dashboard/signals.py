@@ -0,0 +1,139 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.catalog_cache import invalidate_catalog
+from backend.versioning import bump_version, invalidate
+
+from . import insights, streaks
+from .models import (
+    Article, ArticleChatSession, Book, DiscoveryQuestion, Habits, HabitTracking, JournalEntry, KnowledgeHub,
+    QuestionaireUserResponse, TestSession, VisionBoard,
+)
+from .search import article_index, journal_index
+
+# Version namespaces of user-owned data, scoped by user id (see backend.conditional)
+USER_DATA_VERSIONS = {
+    Habits: 'habits',
+    HabitTracking: 'habits',
+    VisionBoard: 'vision_board',
+    TestSession: 'assessment',
+    ArticleChatSession: 'article_chats',
+}
+
+
+@receiver([post_save, post_delete], sender=DiscoveryQuestion)
+@receiver([post_save, post_delete], sender=KnowledgeHub)
+@receiver([post_save, post_delete], sender=Article)
+@receiver([post_save, post_delete], sender=Book)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver([post_save, post_delete], sender=Habits)
+@receiver([post_save, post_delete], sender=HabitTracking)
+@receiver([post_save, post_delete], sender=VisionBoard)
+@receiver([post_save, post_delete], sender=TestSession)
+@receiver([post_save, post_delete], sender=ArticleChatSession)
+def user_data_changed(sender, instance, **kwargs):
+    invalidate(USER_DATA_VERSIONS[sender], instance.user_id)
+
+
+@receiver(post_save, sender=QuestionaireUserResponse)
+@receiver(post_delete, sender=QuestionaireUserResponse)
+def response_changed(sender, instance, **kwargs):
+    # Also the session the response was moved away from, if any
+    session_ids = {instance.test_session_id, getattr(instance, '_stored_session_id', None)} - {None}
+    for user_id in set(TestSession.objects.filter(pk__in=session_ids).values_list('user_id', flat=True)):
+        invalidate('assessment', user_id)
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, **kwargs):
+    article_index.sync(instance)
+    insights.article_saved(instance)
+    if instance.tags != getattr(instance, '_stored_tags', None):
+        instance.sync_normalized_tags()
+    bump_version('article_tags')
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    article_index.remove(instance.pk)
+    bump_version('article_tags')
+
+
+@receiver(m2m_changed, sender=Article.normalized_tags.through)
+def retag_article(sender, **kwargs):
+    if kwargs['action'] in ('post_add', 'post_remove', 'post_clear'):
+        bump_version('article_tags')
+
+
+
+@receiver(post_save, sender=QuestionaireUserResponse)
+def score_response(sender, instance, created, **kwargs):
+    # Only the sessions' pks are needed, avoid loading the session rows
+    session = TestSession(pk=instance.test_session_id)
+    stored_option = getattr(instance, '_stored_option', None)
+    stored_session_id = getattr(instance, '_stored_session_id', None)
+    if created:
+        session.add_to_score(instance.get_numeric_score())
+    elif stored_option is None or stored_session_id is None:
+        # We don't know what was stored before this save, recount instead
+        session.update_score()
+    elif stored_session_id != instance.test_session_id:
+        # Moved to another session: debit the old one, credit the new one
+        TestSession(pk=stored_session_id).add_to_score(-instance.numeric_score(stored_option))
+        session.add_to_score(instance.get_numeric_score())
+    else:
+        session.add_to_score(instance.get_numeric_score() - instance.numeric_score(stored_option))
+    instance._stored_option = instance.selected_option
+    instance._stored_session_id = instance.test_session_id
+
+
+@receiver(post_delete, sender=QuestionaireUserResponse)
+def unscore_response(sender, instance, **kwargs):
+    stored_option = getattr(instance, '_stored_option', None) or instance.selected_option
+    stored_session_id = getattr(instance, '_stored_session_id', None) or instance.test_session_id
+    TestSession(pk=stored_session_id).add_to_score(-instance.numeric_score(stored_option))
+
+
+@receiver(post_save, sender=HabitTracking)
+def update_streak(sender, instance, created, **kwargs):
+    if instance.user_id is None:
+        return
+    stored = None if created else getattr(instance, '_stored_state', None)
+    # A defaulted date is still the timezone.now() datetime on the instance
+    day = HabitTracking._meta.get_field('date').to_python(instance.date)
+    current = (instance.habit_id, day, instance.is_done)
+    instance._stored_state = current
+    if stored == current:
+        return
+    if instance.is_done and (created or stored == (instance.habit_id, instance.date, False)):
+        streaks.record_check_in(instance.user_id, instance.habit_id, day)
+    elif created:
+        return
+    else:
+        habit_ids = {instance.habit_id} | ({stored[0]} if stored else set())
+        streaks.recompute(instance.user_id, habit_ids)
+
+
+@receiver(post_delete, sender=HabitTracking)
+def drop_from_streak(sender, instance, **kwargs):
+    if instance.user_id is not None and instance.is_done:
+        streaks.recompute(instance.user_id, [instance.habit_id])
+
+
+@receiver(post_save, sender=JournalEntry)
+@receiver(post_delete, sender=JournalEntry)
+def invalidate_journal(sender, instance, **kwargs):
+    invalidate('journal', instance.user_id)
+
+
+@receiver(post_save, sender=JournalEntry)
+def index_journal_entry(sender, instance, **kwargs):
+    journal_index.sync(instance)
+
+
+@receiver(post_delete, sender=JournalEntry)
+def unindex_journal_entry(sender, instance, **kwargs):
+    journal_index.remove(instance.pk)
@@ -0,0 +1,143 @@
+"""
+Streak and completion-rate engine for habits.
+
+Every (user, habit) pair with tracking history has one ``HabitStreak`` row.
+Ticking off the day after the last done day is applied as a single UPDATE;
+anything else (un-ticking, back-filling, deletes, bulk upserts) recomputes the
+affected pairs from their done dates. The rolling 7/30 day counts are tied to
+``computed_on`` and refreshed for the whole user with one bounded aggregate
+the first time they are read on a new day.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import HabitStreak, HabitTracking
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def compute_figures(done_dates, today):
+    """Streak figures from a user's ascending, distinct done dates for one habit."""
+    streak_length = longest = 0
+    previous = None
+    for day in done_dates:
+        streak_length = streak_length + 1 if previous is not None and day - previous == ONE_DAY else 1
+        longest = max(longest, streak_length)
+        previous = day
+    return {
+        'streak_length': streak_length,
+        'longest_streak': longest,
+        'last_done_date': previous,
+        'done_last_7_days': sum(1 for day in done_dates if today - datetime.timedelta(days=7) < day <= today),
+        'done_last_30_days': sum(1 for day in done_dates if today - datetime.timedelta(days=30) < day <= today),
+        'computed_on': today,
+    }
+
+
+def recompute(user_id, habit_ids, today=None):
+    """Rebuild the streak rows of ``habit_ids`` for one user with a single history query."""
+    today = today or timezone.localdate()
+    done = {habit_id: [] for habit_id in habit_ids}
+    for habit_id, day in (
+        HabitTracking.objects.filter(user_id=user_id, habit_id__in=done, is_done=True)
+        .order_by('habit_id', 'date')
+        .values_list('habit_id', 'date')
+    ):
+        done[habit_id].append(day)
+
+    HabitStreak.objects.bulk_create(
+        [
+            HabitStreak(user_id=user_id, habit_id=habit_id, **compute_figures(dates, today))
+            for habit_id, dates in done.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'habit'],
+        update_fields=[
+            'streak_length', 'longest_streak', 'last_done_date',
+            'done_last_7_days', 'done_last_30_days', 'computed_on',
+        ],
+    )
+
+
+def record_check_in(user_id, habit_id, day, today=None):
+    """
+    Apply a newly done day. Extending the streak by one day is a single
+    UPDATE; any other change falls back to recomputing the pair.
+    """
+    today = today or timezone.localdate()
+    extended = HabitStreak.objects.filter(
+        user_id=user_id, habit_id=habit_id, last_done_date=day - ONE_DAY, computed_on=today,
+    ).update(
+        streak_length=F('streak_length') + 1,
+        longest_streak=Greatest(F('longest_streak'), F('streak_length') + 1),
+        last_done_date=day,
+        done_last_7_days=F('done_last_7_days') + int(today - datetime.timedelta(days=7) < day <= today),
+        done_last_30_days=F('done_last_30_days') + int(today - datetime.timedelta(days=30) < day <= today),
+    )
+    if not extended:
+        recompute(user_id, [habit_id], today)
+
+
+def streaks_for_user(user, today=None):
+    """A user's streak rows, with stale rolling windows refreshed in one aggregate query."""
+    today = today or timezone.localdate()
+    streaks = list(HabitStreak.objects.filter(user=user).select_related('habit').order_by('habit_id'))
+    stale = [streak for streak in streaks if streak.computed_on != today]
+    if not stale:
+        return streaks
+
+    counts = {
+        row['habit_id']: row
+        for row in HabitTracking.objects.filter(
+            user=user,
+            habit_id__in=[streak.habit_id for streak in stale],
+            is_done=True,
+            date__gt=today - datetime.timedelta(days=30),
+            date__lte=today,
+        ).values('habit_id').annotate(
+            last_7=Count('id', filter=Q(date__gt=today - datetime.timedelta(days=7))),
+            last_30=Count('id'),
+        )
+    }
+    for streak in stale:
+        row = counts.get(streak.habit_id, {})
+        streak.done_last_7_days = row.get('last_7', 0)
+        streak.done_last_30_days = row.get('last_30', 0)
+        streak.computed_on = today
+    HabitStreak.objects.bulk_update(stale, ['done_last_7_days', 'done_last_30_days', 'computed_on'])
+    return streaks
+
+
+def rebuild_all(batch_size=1000, today=None):
+    """Recompute every streak row in one streaming pass over the done history."""
+    today = today or timezone.localdate()
+    rows = (
+        HabitTracking.objects.filter(is_done=True, user__isnull=False)
+        .order_by('user_id', 'habit_id', 'date')
+        .values_list('user_id', 'habit_id', 'date')
+        .iterator(chunk_size=batch_size)
+    )
+    created = 0
+    with transaction.atomic():
+        HabitStreak.objects.all().delete()
+        batch = []
+        key, dates = None, []
+        for user_id, habit_id, day in rows:
+            if (user_id, habit_id) != key:
+                if key is not None:
+                    batch.append(HabitStreak(user_id=key[0], habit_id=key[1], **compute_figures(dates, today)))
+                key, dates = (user_id, habit_id), []
+            dates.append(day)
+            if len(batch) >= batch_size:
+                HabitStreak.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if key is not None:
+            batch.append(HabitStreak(user_id=key[0], habit_id=key[1], **compute_figures(dates, today)))
+        HabitStreak.objects.bulk_create(batch)
+        created += len(batch)
+    return created
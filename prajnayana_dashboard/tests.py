@@ -1,3 +1,1620 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import datetime
+import gzip
+import importlib
+import io
+import itertools
+import json
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, OperationalError, connection, connections
+from django.db.models import QuerySet
+from django.conf import settings
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from authentication_app.models import User
+from coaching_app.models import Coach, Reservation
+from backend import checks, renderers
+from backend.catalog_cache import catalog_metrics
+from backend.fastpath import compile_serializer
+from backend.testing import FakeOpenAIServer, IndexUsageTestCase, QueryBudgetTestCase
+
+from . import chat, insights, llm
+from .search import article_index
+from .llm_gateway import CircuitOpen, DeadlineExceeded, LLMGateway, Saturated
+from .models import *
+from .serializers import ArticleSerializer, JournalEntrySerializer, QuestionaireSubmissionSerializer
+from .views import HabitTrackingViewSet, JournalEntryViewSet, TestSessionViewSet, VisionBoardViewSet
+
+_counter = itertools.count()
+
+
+class ListQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('budget', 'budget@example.com', 'pass')
+        self.hub = KnowledgeHub.objects.create(
+            content='hub', image_url='https://example.com/hub.png',
+            title=KnowledgeHubCategory.SELF_AWARENESS,
+        )
+
+    def test_discovery_questions(self):
+        self.assertQueryBudget('/api/discovery_questions/', 1, lambda n: DiscoveryQuestion.objects.bulk_create(
+            [DiscoveryQuestion(text=f'question {next(_counter)}') for _ in range(n)]
+        ))
+
+    def test_test_sessions(self):
+        self.assertQueryBudget('/api/test_sessions/', 1, lambda n: TestSession.objects.bulk_create([
+            TestSession(user=self.user, score=3, session_date=datetime.date(2030, 1, 1) + datetime.timedelta(next(_counter)))
+            for _ in range(n)
+        ]))
+
+    def test_user_responses(self):
+        session = TestSession.objects.create(user=self.user)
+
+        def make_rows(n):
+            questions = DiscoveryQuestion.objects.bulk_create(
+                [DiscoveryQuestion(text=f'question {next(_counter)}') for _ in range(n)]
+            )
+            QuestionaireUserResponse.objects.bulk_create(
+                [QuestionaireUserResponse(test_session=session, question=q, selected_option='3') for q in questions]
+            )
+        self.assertQueryBudget('/api/user_responses/', 1, make_rows)
+
+    def test_habits(self):
+        self.assertQueryBudget('/api/habits/', 1, lambda n: Habits.objects.bulk_create(
+            [Habits(habit=f'habit {next(_counter)}', user=self.user, description='d') for _ in range(n)]
+        ))
+
+    def test_habit_tracking(self):
+        def make_rows(n):
+            habits = Habits.objects.bulk_create(
+                [Habits(habit=f'habit {next(_counter)}', user=self.user, description='d') for _ in range(n)]
+            )
+            HabitTracking.objects.bulk_create(
+                [HabitTracking(habit=habit, user=self.user, is_done=True) for habit in habits]
+            )
+        self.assertQueryBudget('/api/habit_tracking/', 1, make_rows)
+
+    def test_journal(self):
+        self.assertQueryBudget('/api/journal/', 1, lambda n: JournalEntry.objects.bulk_create(
+            [JournalEntry(user=self.user, mood='Happy', content='entry') for _ in range(n)]
+        ))
+
+    def test_knowledge_hub(self):
+        self.assertQueryBudget('/api/knowledge-hub/', 1, lambda n: KnowledgeHub.objects.bulk_create(
+            [KnowledgeHub(content='c', image_url='https://example.com/a.png',
+                          title=KnowledgeHubCategory.PERSONAL_GROWTH) for _ in range(n)]
+        ))
+
+    def test_articles(self):
+        self.assertQueryBudget('/api/articles/', 1, lambda n: Article.objects.bulk_create(
+            [Article(title='a', summary='s', content='c', image_url='https://example.com/a.png',
+                     knowledgehub=self.hub) for _ in range(n)]
+        ))
+
+    def test_vision_board(self):
+        self.assertQueryBudget('/api/vision-board/', 1, lambda n: VisionBoard.objects.bulk_create(
+            [VisionBoard(user=self.user, content='goal', category=VisionBoardCategory.GOAL) for _ in range(n)]
+        ))
+
+    def test_article_chats(self):
+        article = Article.objects.create(title='a', summary='s', content='c', image_url='https://example.com/a.png')
+        self.assertQueryBudget('/api/article-chats/', 1, lambda n: ArticleChatSession.objects.bulk_create(
+            [ArticleChatSession(user=self.user, article=article) for _ in range(n)]
+        ))
+
+    def test_books(self):
+        self.assertQueryBudget('/api/books/', 1, lambda n: Book.objects.bulk_create(
+            [Book(title='b', category=BookRecommendatioCategory.QUOTE, summary='s') for _ in range(n)]
+        ))
+
+
+class ArticleSearchTests(APITestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(User.objects.create_user('reader', 'reader@example.com', 'pass'))
+        article = lambda **fields: Article.objects.create(image_url='https://example.com/a.png', **{
+            'summary': 'A short read.', 'content': 'Plain text.', **fields,
+        })
+        self.in_title = article(title='Mindful breathing', content='Slow down and notice the air.')
+        self.in_content = article(title='Evening routine', content='Dim the lights, some breathing, then sleep.')
+        self.in_tags = article(title='Rest', tags='breathing,sleep')
+        self.unrelated = article(title='Gratitude', content='Write three things down.')
+
+    def ids(self, query):
+        for cache in caches.all():
+            cache.clear()
+        return [row['id'] for row in self.client.get('/api/articles/', {'search': query}).json()['results']]
+
+    def test_title_matches_rank_first(self):
+        hits = article_index.search('breathing')
+        self.assertEqual([hit.pk for hit in hits], [self.in_title.pk, self.in_tags.pk, self.in_content.pk])
+        self.assertEqual(self.ids('breathing'), [hit.pk for hit in hits])
+
+    def test_snippets_come_from_the_content(self):
+        rows = self.client.get('/api/articles/', {'search': 'lights'}).json()['results']
+        self.assertEqual(rows[0]['snippet'], 'Dim the <mark>lights</mark>, some breathing, then sleep.')
+
+    def test_terms_are_prefixes_and_all_required(self):
+        self.assertEqual(self.ids('breath slee'), [self.in_tags.pk, self.in_content.pk])
+        self.assertEqual(self.ids('breathing gratitude'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.unrelated.content = 'Breathing counts too.'
+        self.unrelated.save()
+        self.assertIn(self.unrelated.pk, self.ids('breathing'))
+        self.in_title.delete()
+        self.assertNotIn(self.in_title.pk, self.ids('breathing'))
+
+    def test_rebuild_after_bulk_loads(self):
+        loaded = Article.objects.bulk_create([
+            Article(title='Imported breathing guide', summary='s', content='c', image_url='https://example.com/a.png'),
+        ])[0]
+        self.assertNotIn(loaded.pk, self.ids('breathing'))
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.ids('breathing')[0], loaded.pk)
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('pager', 'pager@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        entries = JournalEntry.objects.bulk_create(
+            [JournalEntry(user=self.user, mood='Happy', content=f'entry {i}') for i in range(11)]
+        )
+        # Groups of three share a timestamp, so pages must break ties on id
+        base = timezone.now()
+        for i, entry in enumerate(entries):
+            JournalEntry.objects.filter(pk=entry.pk).update(timestamp=base - datetime.timedelta(minutes=i // 3))
+        JournalEntry.objects.create(user=User.objects.create_user('other', 'other@example.com', 'pass'), content='x')
+        self.expected = list(
+            JournalEntry.objects.filter(user=self.user).order_by('-timestamp', 'id').values_list('id', flat=True)
+        )
+
+    def walk(self, url, direction):
+        ids, pages = [], []
+        while url:
+            for cache in caches.all():
+                cache.clear()
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([row['id'] for row in body['results']])
+            url = body[direction]
+        if direction == 'previous':
+            pages.reverse()
+        for page in pages:
+            ids += page
+        return ids, pages
+
+    def test_walks_every_page_both_ways(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZATION=fast):
+                forward, pages = self.walk('/api/journal/?page_size=4', 'next')
+                self.assertEqual(forward, self.expected)
+                self.assertEqual([len(page) for page in pages], [4, 4, 3])
+
+                last = self.client.get('/api/journal/?page_size=4').json()
+                while last['next']:
+                    last = self.client.get(last['next']).json()
+                backward, pages = self.walk(last['previous'], 'previous')
+                self.assertEqual(backward, self.expected[:8])
+                self.assertEqual(len(backward), len(set(backward)))
+
+    def test_first_page_has_no_previous_link(self):
+        body = self.client.get('/api/journal/?page_size=20').json()
+        self.assertIsNone(body['previous'])
+        self.assertIsNone(body['next'])
+        self.assertEqual([row['id'] for row in body['results']], self.expected)
+
+    def test_invalid_cursors(self):
+        def cursor(position):
+            return base64.b64encode(urlencode({'p': json.dumps(position)}).encode()).decode()
+
+        tampered = (
+            [1], ['notadate', 1], [None, 1], [{'a': 1}, 1], ['2020-01-01T00:00:00', 'x'], [[1], 1],
+        )
+        requests = itertools.chain(
+            [('/api/journal/', 'garbage')],
+            [('/api/journal/', cursor(position)) for position in tampered],
+            [('/api/habit_tracking/', cursor(position)) for position in tampered],
+            [('/api/articles/', cursor(position)) for position in ([None], [{'a': 1}], ['x'])],
+            [('/api/articles/?search=calm', cursor(position)) for position in (['x', 1], [1, None])],
+        )
+        for url, value in requests:
+            with self.subTest(url=url, cursor=value):
+                self.assertEqual(self.client.get(url, {'cursor': value}).status_code, 404)
+
+
+class IncrementalScoreTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('scored', 'scored@example.com', 'pass')
+        self.session = TestSession.objects.create(user=self.user)
+        self.other = TestSession.objects.create(user=self.user, session_date=datetime.date(2030, 1, 7))
+        self.questions = DiscoveryQuestion.objects.bulk_create([DiscoveryQuestion(text=f'q{i}') for i in range(3)])
+
+    def answer(self, question, option, session=None):
+        return QuestionaireUserResponse.objects.create(
+            test_session=session or self.session, question=question, selected_option=option,
+        )
+
+    def scores(self):
+        return [TestSession.objects.get(pk=session.pk).score for session in (self.session, self.other)]
+
+    def test_create_change_and_delete(self):
+        first = self.answer(self.questions[0], '4')
+        second = self.answer(self.questions[1], '2')
+        self.assertEqual(self.scores(), [6, None])
+
+        first.selected_option = '1'
+        first.save()
+        reloaded = QuestionaireUserResponse.objects.get(pk=second.pk)
+        reloaded.selected_option = '5'
+        with self.assertNumQueries(3):  # the user lookup for the version, the update and the score delta
+            reloaded.save()
+        self.assertEqual(self.scores(), [6, None])
+
+        QuestionaireUserResponse.objects.get(pk=first.pk).delete()
+        self.assertEqual(self.scores(), [5, None])
+        reloaded.delete()
+        self.assertEqual(self.scores(), [0, None])
+
+    def test_moving_a_response_debits_the_old_session(self):
+        response = self.answer(self.questions[0], '4')
+        self.answer(self.questions[1], '3')
+        response = QuestionaireUserResponse.objects.get(pk=response.pk)
+        response.test_session = self.other
+        response.selected_option = '2'
+        response.save()
+        self.assertEqual(self.scores(), [3, 2])
+
+        response.delete()
+        self.assertEqual(self.scores(), [3, 0])
+
+    def test_rebuild_matches_the_incremental_totals(self):
+        for question, option in zip(self.questions, '153'):
+            self.answer(question, option)
+        self.answer(self.questions[0], '2', self.other)
+        incremental = self.scores()
+        self.assertEqual(incremental, [self.session.calculate_score(), self.other.calculate_score()])
+        call_command('rebuild_test_scores', '--check', stdout=io.StringIO())
+
+        TestSession.objects.update(score=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_test_scores', '--check', stdout=io.StringIO())
+        call_command('rebuild_test_scores', '--batch-size', '1', stdout=io.StringIO())
+        self.assertEqual(self.scores(), incremental)
+
+
+class QuestionaireSubmissionTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('submitter', 'submitter@example.com', 'pass')
+        self.questions = DiscoveryQuestion.objects.bulk_create([DiscoveryQuestion(text=f'q{i}') for i in range(3)])
+
+    def serializer(self, responses):
+        return QuestionaireSubmissionSerializer(data={'responses': responses})
+
+    def answers(self, *options):
+        return [{'question_id': q.pk, 'selected_option': option} for q, option in zip(self.questions, options)]
+
+    def assertInvalid(self, responses, message):
+        serializer = self.serializer(responses)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn(message, json.dumps(serializer.errors))
+
+    def test_validates_with_one_query(self):
+        serializer = self.serializer(self.answers(0, 2, 4))
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual([r['selected_option'] for r in serializer.validated_data['responses']], ['1', '3', '5'])
+
+    def test_rejects_bad_submissions(self):
+        self.assertInvalid(self.answers(0, 1) + [{'question_id': 999999, 'selected_option': 1}], 'Unknown question ids')
+        self.assertInvalid(self.answers(0) * 2, 'only be answered once')
+        self.assertInvalid(self.answers(0, 5), 'less than or equal to 4')
+        self.assertInvalid(self.answers(-1), 'greater than or equal to 0')
+        self.assertInvalid([], 'may not be empty')
+
+    def test_stores_answers_and_score(self):
+        serializer = self.serializer(self.answers(0, 2, 4))
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(user=self.user)
+        self.assertTrue(serializer.submitted)
+        self.assertEqual(session.score, 9)
+        self.assertEqual(TestSession.objects.get().calculate_score(), 9)
+
+    def test_failure_partway_stores_nothing(self):
+        started = TestSession.objects.create(user=self.user)
+        serializer = self.serializer(self.answers(0, 2, 4))
+        serializer.is_valid(raise_exception=True)
+        with mock.patch.object(QuestionaireUserResponse.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            with self.assertRaises(DatabaseError):
+                serializer.save(user=self.user)
+        self.assertEqual(TestSession.objects.get().score, started.score)
+        self.assertFalse(QuestionaireUserResponse.objects.exists())
+
+        started.delete()
+        serializer = self.serializer(self.answers(0, 2, 4))
+        serializer.is_valid(raise_exception=True)
+        with mock.patch.object(QuestionaireUserResponse.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            with self.assertRaises(DatabaseError):
+                serializer.save(user=self.user)
+        self.assertFalse(TestSession.objects.exists())
+
+
+class BulkCheckInTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('checker', 'checker@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.walk = Habits.objects.create(habit='Walk', user=self.user, description='d')
+        self.water = Habits.objects.create(habit='Drink water', description='d')
+
+    def bulk(self, *items):
+        return self.client.post('/api/habit_tracking/bulk/', {'items': list(items)}, format='json')
+
+    def test_repeated_check_ins_update_the_row(self):
+        first = self.bulk({'habit_id': self.walk.pk, 'date': '2020-01-07', 'is_done': False},
+                          {'habit_id': self.water.pk, 'date': '2020-01-07'})
+        self.assertEqual(first.status_code, 200)
+        second = self.bulk({'habit_id': self.walk.pk, 'date': '2020-01-07', 'is_done': True},
+                           {'habit_id': self.walk.pk, 'date': '2020-01-08', 'is_done': True})
+        self.assertEqual(second.status_code, 200)
+
+        rows = dict(HabitTracking.objects.filter(habit=self.walk).values_list('date', 'is_done'))
+        self.assertEqual(rows, {datetime.date(2020, 1, 7): True, datetime.date(2020, 1, 8): True})
+        self.assertEqual(HabitTracking.objects.count(), 3)
+        self.assertEqual(second.json()[0]['id'], first.json()[0]['id'])
+
+    def test_rejects_repeats_and_foreign_habits(self):
+        foreign = Habits.objects.create(habit='Theirs', description='d',
+                                        user=User.objects.create_user('owner', 'owner@example.com', 'pass'))
+        repeated = self.bulk({'habit_id': self.walk.pk, 'date': '2020-01-07'},
+                             {'habit_id': self.walk.pk, 'date': '2020-01-07', 'is_done': False})
+        self.assertEqual(repeated.status_code, 400)
+        self.assertEqual(self.bulk({'habit_id': foreign.pk}).status_code, 400)
+        self.assertFalse(HabitTracking.objects.exists())
+
+
+    def test_rejects_future_dates(self):
+        tomorrow = (timezone.localdate() + datetime.timedelta(days=1)).isoformat()
+        self.assertEqual(self.bulk({'habit_id': self.walk.pk, 'date': tomorrow}).status_code, 400)
+        single = {'habit_id': self.walk.pk, 'date': tomorrow, 'is_done': True}
+        self.assertEqual(self.client.post('/api/habit_tracking/', single, format='json').status_code, 400)
+        self.assertFalse(HabitTracking.objects.exists())
+        self.assertEqual(self.bulk({'habit_id': self.walk.pk, 'date': timezone.localdate().isoformat()}).status_code, 200)
+
+    def test_updates_cannot_move_a_row_onto_a_tracked_day(self):
+        monday = HabitTracking.objects.create(habit=self.walk, user=self.user, date=datetime.date(2020, 1, 6))
+        tuesday = HabitTracking.objects.create(habit=self.walk, user=self.user, date=datetime.date(2020, 1, 7))
+        HabitTracking.objects.create(habit=self.water, user=self.user, date=datetime.date(2020, 1, 6))
+        url = f'/api/habit_tracking/{tuesday.pk}/'
+        self.assertEqual(self.client.patch(url, {'date': '2020-01-06'}, format='json').status_code, 400)
+        moved = {'habit_id': self.water.pk, 'date': '2020-01-06', 'is_done': True}
+        self.assertEqual(self.client.put(url, moved, format='json').status_code, 400)
+        response = self.client.patch(url, {'is_done': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_done'])
+        free_day = self.client.patch(f'/api/habit_tracking/{monday.pk}/', {'date': '2020-01-08'}, format='json')
+        self.assertEqual(free_day.status_code, 200)
+
+
+class HabitStreakTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('streaker', 'streaker@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.habit = Habits.objects.create(habit='Walk', user=self.user, description='d')
+        self.today = timezone.localdate()
+
+    def streak(self):
+        return HabitStreak.objects.get(user=self.user, habit=self.habit)
+
+    def test_check_in_without_a_date(self):
+        tracked = HabitTracking.objects.create(habit=self.habit, user=self.user, is_done=True)
+        self.assertEqual((self.streak().streak_length, self.streak().last_done_date), (1, self.today))
+        tracked.save()
+        self.assertEqual(self.streak().streak_length, 1)
+
+    def test_consecutive_days_extend_the_streak(self):
+        for offset in (3, 2, 1, 0):
+            HabitTracking.objects.create(habit=self.habit, user=self.user, is_done=True,
+                                         date=self.today - datetime.timedelta(days=offset))
+        streak = self.streak()
+        self.assertEqual((streak.streak_length, streak.longest_streak, streak.done_last_7_days), (4, 4, 4))
+
+        HabitTracking.objects.filter(date=self.today - datetime.timedelta(days=1)).get().delete()
+        stats = self.client.get('/api/habit_tracking/stats/').json()
+        self.assertEqual((stats[0]['current_streak'], stats[0]['longest_streak']), (1, 2))
+
+
+class HabitHeatmapTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('mapper', 'mapper@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.walk = Habits.objects.create(habit='Walk', user=self.user, description='d')
+        self.water = Habits.objects.create(habit='Drink water', description='d')
+        for habit, day, is_done in (
+            (self.walk, datetime.date(2024, 1, 1), True),
+            (self.walk, datetime.date(2024, 3, 1), True),
+            (self.walk, datetime.date(2024, 12, 31), True),
+            (self.walk, datetime.date(2024, 6, 1), False),
+            (self.walk, datetime.date(2025, 1, 1), True),
+            (self.water, datetime.date(2024, 2, 29), True),
+        ):
+            HabitTracking.objects.create(habit=habit, user=self.user, date=day, is_done=is_done)
+        other = User.objects.create_user('neighbour', 'neighbour@example.com', 'pass')
+        HabitTracking.objects.create(habit=self.water, user=other, date=datetime.date(2024, 1, 2), is_done=True)
+
+    @staticmethod
+    def days_in(mask):
+        data = base64.b64decode(mask)
+        return [i for i in range(len(data) * 8) if data[i // 8] >> (i % 8) & 1]
+
+    def test_masks(self):
+        body = self.client.get('/api/habit_tracking/heatmap/?year=2024').json()
+        self.assertEqual((body['year'], body['days'], body['encoding']), (2024, 366, 'base64-bitset-lsb'))
+        habits = {row['habit_id']: row for row in body['habits']}
+        self.assertEqual(set(habits), {self.walk.pk, self.water.pk})
+        self.assertEqual(self.days_in(habits[self.walk.pk]['mask']), [0, 60, 365])
+        self.assertEqual(habits[self.walk.pk]['done_days'], 3)
+        self.assertEqual(self.days_in(habits[self.water.pk]['mask']), [59])
+        self.assertEqual(len(base64.b64decode(habits[self.water.pk]['mask'])), 46)
+
+    def test_invalid_years(self):
+        for year in ('abc', '0', '10000', '99999999999', '-5'):
+            with self.subTest(year=year):
+                response = self.client.get('/api/habit_tracking/heatmap/', {'year': year})
+                self.assertEqual(response.status_code, 400)
+
+
+class JournalMoodTests(APITestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user('moody', 'moody@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        for day, mood in (
+            (datetime.date(2030, 1, 6), 'Happy'),  # a Sunday
+            (datetime.date(2030, 1, 7), 'Sad'),
+            (datetime.date(2030, 1, 7), 'Sad'),
+            (datetime.date(2030, 1, 31), 'Happy'),
+            (datetime.date(2030, 2, 1), 'Stressed'),
+        ):
+            JournalEntry.objects.create(user=self.user, date=day, mood=mood, content='entry')
+        JournalEntry.objects.create(user=User.objects.create_user('calm', 'calm@example.com', 'pass'),
+                                    date=datetime.date(2030, 1, 7), mood='Excited', content='entry')
+
+    def report(self, **params):
+        response = self.client.get('/api/journal/moods/', {'start': '2030-01-01', 'end': '2030-02-28', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def periods(self, body):
+        return [(row['period'][:10], row['total'], row['dominant']) for row in body['buckets']]
+
+    def test_buckets(self):
+        self.assertEqual(self.periods(self.report(bucket='day')), [
+            ('2030-01-06', 1, 'Happy'), ('2030-01-07', 2, 'Sad'),
+            ('2030-01-31', 1, 'Happy'), ('2030-02-01', 1, 'Stressed'),
+        ])
+        self.assertEqual(self.periods(self.report(bucket='week')), [
+            ('2029-12-31', 1, 'Happy'), ('2030-01-07', 2, 'Sad'), ('2030-01-28', 2, 'Happy'),
+        ])
+        monthly = self.report(bucket='month')
+        self.assertEqual(self.periods(monthly), [('2030-01-01', 4, 'Happy'), ('2030-02-01', 1, 'Stressed')])
+        self.assertEqual(monthly['totals'], {'Happy': 2, 'Sad': 2, 'Neutral': 0, 'Excited': 0, 'Stressed': 1})
+
+    def test_range_is_inclusive(self):
+        body = self.report(start='2030-01-07', end='2030-01-31')
+        self.assertEqual(self.periods(body), [('2030-01-07', 2, 'Sad'), ('2030-01-31', 1, 'Happy')])
+
+    def test_invalid_parameters(self):
+        for params in ({'bucket': 'year'}, {'start': '2030-13-01'}, {'start': '2030-03-01'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/journal/moods/', {'start': '2030-01-01', 'end': '2030-02-28', **params})
+                self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_the_journal_changes(self):
+        self.report(bucket='month')
+        with self.assertNumQueries(0):
+            self.report(bucket='month')
+        with self.captureOnCommitCallbacks(execute=True):
+            JournalEntry.objects.create(user=self.user, date=datetime.date(2030, 2, 2), mood='Stressed', content='e')
+        self.assertEqual(self.periods(self.report(bucket='month'))[1], ('2030-02-01', 2, 'Stressed'))
+
+
+class JournalExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('exporter', 'exporter@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.entries = [
+            JournalEntry.objects.create(user=self.user, date=datetime.date(2030, 1, day), mood='Happy',
+                                        content=f'Day {day}, "quoted", caf\u00e9\nsecond line')
+            for day in (5, 6, 7)
+        ]
+        JournalEntry.objects.create(user=User.objects.create_user('hidden', 'hidden@example.com', 'pass'),
+                                    content='not mine')
+
+    def export(self, **params):
+        response = self.client.get('/api/journal/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="journal-\d{8}\.ndjson"')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [entry.pk for entry in self.entries])
+        self.assertEqual(set(rows[0]), {'id', 'date', 'timestamp', 'mood', 'content'})
+        self.assertEqual((rows[0]['date'], rows[0]['content']), ('2030-01-05', self.entries[0].content))
+
+    def test_csv_with_a_date_range(self):
+        response, body = self.export(export_format='csv', start='2030-01-06', end='2030-01-06')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ['id', 'date', 'timestamp', 'mood', 'content'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:2], [str(self.entries[1].pk), '2030-01-06'])
+        self.assertEqual(rows[1][4], self.entries[1].content)
+
+    def test_gzip(self):
+        plain = self.export()[1]
+        response, body = self.export(gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.ndjson.gz"'))
+        self.assertEqual(gzip.decompress(body), plain)
+
+    def test_rows_stream_in_chunks(self):
+        with mock.patch.object(JournalEntryViewSet, 'export_chunk_size', 2), \
+                mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator:
+            with self.assertNumQueries(0):
+                response = self.client.get('/api/journal/export/')
+            with self.assertNumQueries(1):
+                lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(iterator.call_args.kwargs, {'chunk_size': 2})
+        self.assertEqual(len(lines), 3)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/journal/export/?export_format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/journal/export/?start=2030-02-30').status_code, 400)
+
+
+class JournalSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.other = User.objects.create_user('private', 'private@example.com', 'pass')
+        self.entry = lambda user, content: JournalEntry.objects.create(user=user, content=content, mood='Happy')
+        self.focused = self.entry(self.user, 'Breathing, breathing and more breathing before sleep.')
+        self.passing = self.entry(self.user, 'A long day at work. Meetings, emails, a walk in the park, '
+                                             'dinner with friends and some breathing at the end.')
+        self.unrelated = self.entry(self.user, 'Went running today.')
+        self.theirs = self.entry(self.other, 'Breathing exercises in the morning.')
+
+    def search(self, q, **params):
+        response = self.client.get('/api/journal/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranking_and_snippets(self):
+        results = self.search('breath')['results']
+        self.assertEqual([row['id'] for row in results], [self.focused.pk, self.passing.pk])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<mark>Breathing</mark>', results[0]['snippet'])
+
+    def test_other_users_entries_are_never_returned(self):
+        self.assertEqual([row['id'] for row in self.search('exercises morning')['results']], [])
+        self.client.force_authenticate(self.other)
+        self.assertEqual([row['id'] for row in self.search('breathing')['results']], [self.theirs.pk])
+
+    def test_numbers_only_match_content(self):
+        # The scope column holds the user id, a numeric term must not match it
+        user_id = str(self.user.pk)
+        self.assertEqual(self.search(user_id)['results'], [])
+        self.assertEqual(self.search(user_id[0])['results'], [])
+        entry = self.entry(self.user, f'Room {user_id}0')
+        self.assertEqual([row['id'] for row in self.search(user_id)['results']], [entry.pk])
+
+    def test_edits_and_deletes_are_reindexed(self):
+        self.focused.content = 'Nothing to see'
+        self.focused.save()
+        self.passing.delete()
+        self.assertEqual(self.search('breathing')['results'], [])
+
+    def test_paging(self):
+        first = self.search('breathing', limit=1)
+        self.assertEqual((len(first['results']), first['next_offset']), (1, 1))
+        second = self.search('breathing', limit=1, offset=1)
+        self.assertIsNone(second['next_offset'])
+        self.assertEqual(self.client.get('/api/journal/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/journal/search/?q=a&limit=0').status_code, 400)
+
+
+class MergeDuplicateTrackingTests(TransactionTestCase):
+
+    def test_keeps_the_newest_row_done_if_any_was(self):
+        migration = importlib.import_module('prajnayana_dashboard.migrations.0017_habittracking_unique_per_day')
+        constraint = next(c for c in HabitTracking._meta.constraints if c.name == 'unique_habit_tracking_per_day')
+        user = User.objects.create_user('dupe', 'dupe@example.com', 'pass')
+        habit = Habits.objects.create(habit='Walk', user=user, description='d')
+        day = datetime.date(2030, 1, 7)
+        # SQLite rebuilds the table from the model's constraints, so hide it there too
+        with connection.schema_editor() as editor, \
+                mock.patch.object(HabitTracking._meta, 'constraints', []):
+            editor.remove_constraint(HabitTracking, constraint)
+        try:
+            done, _, newest = HabitTracking.objects.bulk_create([
+                HabitTracking(user=user, habit=habit, date=day, is_done=is_done) for is_done in (True, False, False)
+            ])
+            single = HabitTracking.objects.create(user=user, habit=habit, date=day + datetime.timedelta(days=1))
+            migration.merge_duplicate_tracking(apps, None)
+            rows = dict(HabitTracking.objects.values_list('id', 'is_done'))
+            self.assertEqual(rows, {newest.pk: True, single.pk: False})
+        finally:
+            HabitTracking.objects.all().delete()
+            with connection.schema_editor() as editor:
+                editor.add_constraint(HabitTracking, constraint)
+
+
+class ArticleSummaryCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        llm.response_cache().clear()
+        self.server = FakeOpenAIServer(delay=0.2)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        overrides = override_settings(OPENAI_BASE_URL=self.server.base_url, OPENAI_API_KEY='test')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def ask(self, question, article='An article about breathing.'):
+        return self.client.post('/api/llm-article-summary/', {'messages': [
+            {'role': 'user', 'content': article},
+            {'role': 'user', 'content': question},
+        ]}, content_type='application/json').json()
+
+    def test_repeated_question_is_answered_from_cache(self):
+        first = self.ask('What is box breathing?')
+        second = self.ask('  What is   box breathing? ')
+        self.assertEqual(first['reply'], second['reply'])
+        self.assertEqual((first['cached'], second['cached']), (False, True))
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(llm.cache_metrics()['hits'], 1)
+
+    def test_key_covers_article_and_conversation(self):
+        self.ask('What is box breathing?')
+        self.ask('What is box breathing?', article='A different article.')
+        self.ask('Why breathe slowly?')
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_concurrent_identical_requests_go_upstream_once(self):
+        conversation = [{'role': 'user', 'content': 'Summarize it'}]
+        replies = []
+        threads = [
+            threading.Thread(target=lambda: replies.append(llm.complete_chat('article', conversation)[0]))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(set(replies)), 1)
+        self.assertEqual(len(replies), 5)
+
+    def test_answer_is_published_before_the_lock_is_released(self):
+        cache = llm.response_cache()
+        delete = cache.delete
+        published = []
+
+        def release(key, *args, **kwargs):
+            if key.endswith(':lock'):
+                published.append(cache.get(key.removesuffix(':lock')))
+            return delete(key, *args, **kwargs)
+
+        conversation = [{'role': 'user', 'content': 'Summarize it'}]
+        with mock.patch.object(cache, 'delete', side_effect=release):
+            reply, _ = llm.complete_chat('article', conversation)
+        self.assertEqual(published, [reply])
+
+        published.clear()
+        with mock.patch.object(cache, 'delete', side_effect=release), \
+                mock.patch.object(llm, '_request_completion', side_effect=RuntimeError('upstream down')):
+            with self.assertRaises(RuntimeError):
+                llm.complete_chat('article', [{'role': 'user', 'content': 'Other question'}])
+        self.assertEqual(published, [None])
+        self.assertFalse(any(key.endswith(':lock') for key in cache._cache))
+
+    async def test_streamed_reply_is_assembled_and_cached(self):
+        body = {'messages': [
+            {'role': 'user', 'content': 'An article about breathing.'},
+            {'role': 'user', 'content': 'What is box breathing?'},
+        ]}
+        response = await self.async_client.post(
+            '/api/llm-article-summary/stream/', body, content_type='application/json'
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertGreater(events.count('event: delta'), 1)
+        done = json.loads(events.split('event: done\ndata: ')[1])
+        self.assertEqual(done['reply'], 'answer to: What is box breathing?')
+        self.assertEqual(done['messages'][-1]['content'], done['reply'])
+
+        cached = await self.async_client.post(
+            '/api/llm-article-summary/stream/', body, content_type='application/json'
+        )
+        events = ''.join([chunk.decode() async for chunk in cached.streaming_content])
+        self.assertEqual(events.count('event: delta'), 1)
+        self.assertEqual(len(self.server.requests), 1)
+
+
+class ArticleChatSessionTests(APITestCase):
+
+    def setUp(self):
+        llm.response_cache().clear()
+        self.server = FakeOpenAIServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        overrides = override_settings(OPENAI_BASE_URL=self.server.base_url, OPENAI_API_KEY='test')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create_user('chatter', 'chatter@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.article = Article.objects.create(
+            title='Breathing', summary='s', content='Box breathing is four counts in, hold, out, hold.',
+            image_url='https://example.com/a.png',
+        )
+
+    def start_session(self):
+        response = self.client.post('/api/article-chats/', {'article': self.article.pk})
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def test_only_the_question_is_sent(self):
+        session_id = self.start_session()
+        for question in ('What is box breathing?', 'How long is each count?'):
+            response = self.client.post(f'/api/article-chats/{session_id}/ask/', {'question': question})
+            self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['reply'], 'answer to: How long is each count?')
+
+        messages = self.server.requests[-1]['messages']
+        self.assertEqual(messages[0]['role'], 'system')
+        self.assertIn(self.article.content, messages[0]['content'])
+        self.assertEqual([m['content'] for m in messages[1:]], [
+            'What is box breathing?', 'answer to: What is box breathing?', 'How long is each count?',
+        ])
+        detail = self.client.get(f'/api/article-chats/{session_id}/').json()
+        self.assertEqual(len(detail['messages']), 4)
+
+    def test_old_turns_are_summarized_past_the_budget(self):
+        session = ArticleChatSession.objects.create(user=self.user, article=self.article, messages=[
+            {'role': 'user', 'content': 'first question ' * 20},
+            {'role': 'assistant', 'content': 'first answer ' * 20},
+            {'role': 'user', 'content': 'second question'},
+            {'role': 'assistant', 'content': 'second answer'},
+        ])
+        conversation, summary, summarized = chat.build_conversation(session, 'third question', budget=40)
+        self.assertEqual(summarized, 2)
+        self.assertTrue(summary.startswith('answer to: '))
+        self.assertEqual(conversation[0]['role'], 'system')
+        self.assertIn(summary, conversation[0]['content'])
+        self.assertEqual([m['content'] for m in conversation[1:]], ['second question', 'second answer', 'third question'])
+        self.assertLessEqual(llm.estimate_tokens(conversation[1:]), 40)
+
+    def test_failed_summary_falls_back_to_truncation(self):
+        session = ArticleChatSession.objects.create(user=self.user, article=self.article, messages=[
+            {'role': 'user', 'content': 'first question ' * 20},
+            {'role': 'assistant', 'content': 'first answer ' * 20},
+        ])
+        self.server.status = 500
+        conversation, summary, summarized = chat.build_conversation(session, 'next question', budget=40)
+        self.assertEqual((summary, summarized), ('', 0))
+        self.assertEqual(conversation, [{'role': 'user', 'content': 'next question'}])
+
+        # The turns that were left out are summarized once upstream recovers
+        self.server.status = 200
+        conversation, summary, summarized = chat.build_conversation(session, 'next question', budget=40)
+        self.assertEqual(summarized, 2)
+        self.assertIn('first question', self.server.requests[-1]['messages'][-1]['content'])
+        self.assertIn(summary, conversation[0]['content'])
+
+    def test_sessions_are_private(self):
+        session_id = self.start_session()
+        other = User.objects.create_user('other', 'other@example.com', 'pass')
+        self.client.force_authenticate(other)
+        response = self.client.post(f'/api/article-chats/{session_id}/ask/', {'question': 'hi'})
+        self.assertEqual(response.status_code, 404)
+
+
+class LLMGatewayTests(SimpleTestCase):
+    messages = [{'role': 'user', 'content': 'hello'}]
+
+    def setUp(self):
+        self.server = FakeOpenAIServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+
+    def gateway(self, **options):
+        options = {'api_key': 'test', 'base_url': self.server.base_url, 'retry_backoff': 0.01, **options}
+        return LLMGateway(**options)
+
+    def test_client_is_reused(self):
+        gateway = self.gateway()
+        self.assertEqual(gateway.complete(self.messages, 'm'), 'answer to: hello')
+        client = gateway.client
+        gateway.complete(self.messages, 'm')
+        self.assertIs(gateway.client, client)
+        self.assertEqual(gateway.metrics()['succeeded'], 2)
+
+    def test_async_clients_close_with_their_loop(self):
+        gateway = self.gateway()
+
+        async def ask():
+            client = gateway.async_client()
+            self.assertIs(gateway.async_client(), client)
+            pieces = [piece async for piece in gateway.stream(self.messages, 'm')]
+            return client, ''.join(pieces)
+
+        # A loop per call, as under WSGI
+        for label, run in (('asyncio.run', lambda: asyncio.run(ask())), ('async_to_sync', async_to_sync(ask))):
+            with self.subTest(run=label):
+                client, reply = run()
+                self.assertEqual(reply, 'answer to: hello')
+                self.assertTrue(client.is_closed())
+                self.assertEqual(len(gateway._async_clients), 0)
+
+    def test_transient_failures_are_retried(self):
+        self.server.failures = 2
+        gateway = self.gateway(max_retries=2)
+        self.assertEqual(gateway.complete(self.messages, 'm'), 'answer to: hello')
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(gateway.metrics()['retries'], 2)
+
+    def test_deadline_covers_the_whole_call(self):
+        self.server.delay = 0.5
+        gateway = self.gateway(deadline=0.2)
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            gateway.complete(self.messages, 'm')
+        self.assertLess(time.monotonic() - started, 0.45)
+        self.assertEqual(gateway.metrics()['timeouts'], 1)
+
+    def test_circuit_opens_and_recovers(self):
+        self.server.status = 500
+        gateway = self.gateway(max_retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                gateway.complete(self.messages, 'm')
+        with self.assertRaises(CircuitOpen):
+            gateway.complete(self.messages, 'm')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(gateway.metrics()['circuit'], 'open')
+
+        time.sleep(0.25)
+        self.server.status = 200
+        self.assertEqual(gateway.complete(self.messages, 'm'), 'answer to: hello')
+        self.assertEqual(gateway.metrics()['circuit'], 'closed')
+
+    def test_concurrency_is_bounded(self):
+        self.server.delay = 0.3
+        gateway = self.gateway(max_concurrency=1, queue_timeout=0.05)
+        errors = []
+
+        def call():
+            try:
+                gateway.complete(self.messages, 'm')
+            except Saturated as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 1)
+        metrics = gateway.metrics()
+        self.assertEqual((metrics['peak_in_flight'], metrics['rejected_saturated']), (1, 1))
+        self.assertIsNotNone(metrics['latency_ms']['p50'])
+
+    async def test_stream(self):
+        gateway = self.gateway()
+        pieces = [piece async for piece in gateway.stream(self.messages, 'm')]
+        self.assertEqual(''.join(pieces), 'answer to: hello')
+
+    def test_a_cancelled_trial_stream_releases_the_circuit(self):
+        self.server.status = 500
+        gateway = self.gateway(max_retries=0, breaker_threshold=1, breaker_cooldown=0.1)
+        with self.assertRaises(Exception):
+            gateway.complete(self.messages, 'm')
+        time.sleep(0.15)
+        self.server.status, self.server.delay = 200, 0.5
+
+        async def disconnect_mid_trial():
+            task = asyncio.ensure_future(gateway.stream(self.messages, 'm').__anext__())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(disconnect_mid_trial())
+        self.assertFalse(gateway.breaker.trial_running)
+        self.server.delay = 0
+        self.assertEqual(gateway.complete(self.messages, 'm'), 'answer to: hello')
+        self.assertEqual(gateway.metrics()['circuit'], 'closed')
+
+    @override_settings(LLM_BREAKER_THRESHOLD=1, LLM_BREAKER_COOLDOWN=60, LLM_MAX_RETRIES=0)
+    def test_open_circuit_is_a_503(self):
+        self.server.status = 500
+        with override_settings(OPENAI_BASE_URL=self.server.base_url, OPENAI_API_KEY='test'):
+            llm.response_cache().clear()
+            body = {'messages': [{'role': 'user', 'content': 'article'}, {'role': 'user', 'content': 'q'}]}
+            first = self.client.post('/api/llm-article-summary/', body, content_type='application/json')
+            second = self.client.post('/api/llm-article-summary/', body, content_type='application/json')
+        self.assertEqual(first.status_code, 500)
+        self.assertEqual(second.status_code, 503)
+        self.assertIn('Retry-After', second)
+
+
+@override_settings(ARTICLE_INSIGHT_PROVIDER='prajnayana_dashboard.insights.LocalInsightProvider')
+class ArticleInsightTests(APITestCase):
+
+    def setUp(self):
+        self.articles = [
+            Article.objects.create(
+                title=f'Article {i}', summary='s', image_url='https://example.com/a.png',
+                content='Mindfulness is paying attention on purpose. Breathing anchors mindfulness practice.',
+            )
+            for i in range(3)
+        ]
+
+    def test_precompute_is_idempotent_and_resumes(self):
+        call_command('precompute_article_insights', workers=1, stdout=io.StringIO())
+        self.assertEqual(ArticleInsight.objects.filter(status=ArticleInsightStatus.READY).count(), 3)
+        insight = ArticleInsight.objects.get(article=self.articles[0])
+        self.assertEqual(insight.key_terms[0], {
+            'term': 'mindfulness', 'definition': 'Mindfulness is paying attention on purpose.',
+        })
+        self.assertEqual(len(insight.reflective_questions), 2)
+
+        self.assertEqual(insights.precompute(workers=1), {})
+
+        article = self.articles[1]
+        article.content = 'Gratitude journaling builds resilience.'
+        article.save()
+        self.assertEqual(ArticleInsight.objects.get(article=article).status, ArticleInsightStatus.STALE)
+        self.assertEqual(insights.precompute(workers=1), {'computed': 1})
+        self.assertEqual(ArticleInsight.objects.get(article=article).key_terms[0]['term'], 'gratitude')
+
+    def test_endpoint_serves_stored_insights(self):
+        self.client.force_authenticate(User.objects.create_user('reader', 'reader@example.com', 'pass'))
+        url = f'/api/articles/{self.articles[0].pk}/insights/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        insights.compute(self.articles[0].pk)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['provider'], response.json()['stale']), ('local', False))
+
+    def test_llm_provider_against_stub_server(self):
+        payload = {'summary': 'About mindfulness.', 'key_terms': [{'term': 'mindfulness', 'definition': 'attention'}],
+                   'reflective_questions': ['When are you most present?']}
+        with FakeOpenAIServer(reply=lambda body: f"```json\n{json.dumps(payload)}\n```") as server, \
+                override_settings(OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY='test'):
+            outcomes = insights.precompute(provider=insights.LLMInsightProvider(), workers=1)
+        self.assertEqual(outcomes, {'computed': 3})
+        self.assertEqual(ArticleInsight.objects.first().reflective_questions, payload['reflective_questions'])
+
+
+class ArticleTagTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('tagger', 'tagger@example.com', 'pass'))
+        self.hub = KnowledgeHub.objects.create(
+            content='hub', image_url='https://example.com/hub.png', title=KnowledgeHubCategory.SELF_AWARENESS,
+        )
+        self.calm = self.article('Calm, Sleep')
+        self.calmness = self.article('calmness')
+        self.sleep = self.article(' sleep ,  Focus Work', hub=self.hub)
+
+    def article(self, tags, hub=None):
+        return Article.objects.create(title='a', summary='s', content='c', image_url='https://example.com/a.png',
+                                      tags=tags, knowledgehub=hub)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/articles/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {row['id'] for row in response.json()['results']}
+
+    def test_tags_are_normalized_on_save(self):
+        self.assertEqual(list(self.sleep.normalized_tags.values_list('name', flat=True).order_by('name')),
+                         ['focus work', 'sleep'])
+        self.calm.tags = 'calm'
+        self.calm.save()
+        self.assertEqual(list(self.calm.normalized_tags.values_list('name', flat=True)), ['calm'])
+
+    def test_filtering(self):
+        self.assertEqual(self.ids('tag=calm'), {self.calm.pk})
+        self.assertEqual(self.ids('tag=Sleep&tag=calm'), {self.calm.pk})
+        self.assertEqual(self.ids('tag=sleep&tag=calm&tag_mode=any'), {self.calm.pk, self.sleep.pk})
+        self.assertEqual(self.client.get('/api/articles/?tag=calm&tag_mode=some').status_code, 400)
+
+    def test_facets_are_grouped_and_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/articles/facets/')
+        self.assertEqual(response.json()[0], {'tag': 'sleep', 'count': 2})
+        with self.assertNumQueries(0):
+            self.client.get('/api/articles/facets/')
+        self.assertEqual(self.client.get(f'/api/articles/facets/?k_id={self.hub.pk}').json(), [
+            {'tag': 'focus work', 'count': 1}, {'tag': 'sleep', 'count': 1},
+        ])
+        self.article('sleep')
+        self.assertEqual(self.client.get('/api/articles/facets/').json()[0], {'tag': 'sleep', 'count': 3})
+
+    def test_backfill_migration(self):
+        Article.normalized_tags.through.objects.all().delete()
+        Tag.objects.all().delete()
+        migration = importlib.import_module('prajnayana_dashboard.migrations.0022_article_normalized_tags')
+        migration.backfill_tags(apps, None)
+        self.assertEqual(set(self.calm.normalized_tags.values_list('name', flat=True)), {'calm', 'sleep'})
+        self.assertEqual(Tag.objects.count(), 4)
+
+
+class SlimListTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('lister', 'lister@example.com', 'pass'))
+        hub = KnowledgeHub.objects.create(
+            content='hub ' * 500, image_url='https://example.com/hub.png', title=KnowledgeHubCategory.SELF_AWARENESS,
+        )
+        self.articles = Article.objects.bulk_create([
+            Article(title=f'Article {i}', summary='A short summary.', content='Body text. ' * 400,
+                    image_url='https://example.com/a.png', tags='calm', knowledgehub=hub)
+            for i in range(10)
+        ])
+
+    def test_list_leaves_out_bodies(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/articles/')
+        self.assertNotIn('"content"', context.captured_queries[-1]['sql'])
+        row = response.json()['results'][0]
+        self.assertEqual(set(row), {'id', 'title', 'summary', 'level', 'image_url', 'tags', 'knowledgehub'})
+
+        full = ArticleSerializer(Article.objects.select_related('knowledgehub'), many=True).data
+        self.assertLess(len(response.content), len(json.dumps(full)) * 0.1)
+
+        detail = self.client.get(f'/api/articles/{row["id"]}/').json()
+        self.assertEqual(detail['content'], self.articles[0].content)
+
+    def test_sparse_fieldsets(self):
+        rows = self.client.get('/api/articles/?fields=id,title').json()['results']
+        self.assertEqual(set(rows[0]), {'id', 'title'})
+        detail = self.client.get(f'/api/articles/{rows[0]["id"]}/?fields=content').json()
+        self.assertEqual(set(detail), {'content'})
+        hubs = self.client.get('/api/knowledge-hub/?fields=title').json()['results']
+        self.assertEqual(hubs, [{'title': KnowledgeHubCategory.SELF_AWARENESS}])
+        self.assertEqual(self.client.get('/api/articles/?fields=id,body').status_code, 400)
+
+    def test_sparse_fieldsets_cover_search_snippets(self):
+        article_index.rebuild()  # bulk_create skipped the index signals
+        rows = self.client.get('/api/articles/?search=article&fields=id').json()['results']
+        self.assertEqual(set(rows[0]), {'id'})
+        rows = self.client.get('/api/articles/?search=article&fields=id,snippet').json()['results']
+        self.assertEqual(set(rows[0]), {'id', 'snippet'})
+        self.assertEqual(self.client.get('/api/articles/?fields=snippet').json()['results'][0], {})
+
+
+class CatalogCacheTests(APITestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_authenticate(User.objects.create_user('browser', 'browser@example.com', 'pass'))
+        self.book = Book.objects.create(title='Old title', category=BookRecommendatioCategory.QUOTE, summary='s')
+
+    def test_repeat_reads_skip_the_database(self):
+        first = self.client.get('/api/books/').json()
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/books/').json()
+        self.assertEqual(first, second)
+        self.client.get(f'/api/books/{self.book.pk}/')
+        with self.assertNumQueries(0):
+            detail = self.client.get(f'/api/books/{self.book.pk}/').json()
+        self.assertEqual(detail['title'], 'Old title')
+        metrics = catalog_metrics()
+        self.assertEqual((metrics['hits'], metrics['misses']), (2, 2))
+        self.assertEqual(metrics['hit_ratio'], 0.5)
+
+    def test_edits_are_never_served_stale(self):
+        self.client.get('/api/books/')
+        self.client.get(f'/api/books/{self.book.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'New title'
+            self.book.save()
+        self.assertEqual(self.client.get('/api/books/').json()['results'][0]['title'], 'New title')
+        self.assertEqual(self.client.get(f'/api/books/{self.book.pk}/').json()['title'], 'New title')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.delete()
+        self.assertEqual(self.client.get('/api/books/').json()['results'], [])
+
+    def test_a_write_in_another_worker_retires_cached_payloads(self):
+        self.client.get('/api/books/')
+        other_worker = {**settings.CACHES, settings.CATALOG_CACHE_ALIAS: {
+            **settings.CACHES[settings.CATALOG_CACHE_ALIAS], 'LOCATION': 'other-worker',
+        }}
+        with override_settings(CACHES=other_worker), self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'New title'
+            self.book.save()
+        self.assertEqual(self.client.get('/api/books/').json()['results'][0]['title'], 'New title')
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            **settings.CACHES,
+            settings.CATALOG_CACHE_ALIAS: {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+            },
+        }):
+            self.client.get('/api/books/')
+            with self.assertNumQueries(0):
+                self.client.get('/api/books/')
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user('revisit', 'revisit@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.entry = JournalEntry.objects.create(user=self.user, content='First entry', mood='Happy')
+        self.book = Book.objects.create(title='Old title', category=BookRecommendatioCategory.QUOTE, summary='s')
+
+    def test_unchanged_list_is_not_serialized_again(self):
+        etag = self.client.get('/api/journal/')['ETag']
+        with mock.patch.object(JournalEntrySerializer, 'to_representation') as to_representation, \
+                self.assertNumQueries(0):
+            response = self.client.get('/api/journal/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        to_representation.assert_not_called()
+
+    def test_edits_change_the_etag(self):
+        etag = self.client.get('/api/journal/')['ETag']
+        detail_etag = self.client.get(f'/api/journal/{self.entry.pk}/')['ETag']
+        self.assertNotEqual(etag, detail_etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.content = 'Edited entry'
+            self.entry.save()
+        response = self.client.get('/api/journal/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['content'], 'Edited entry')
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get('/api/journal/')['ETag']
+        self.client.force_authenticate(User.objects.create_user('other', 'other@example.com', 'pass'))
+        self.assertEqual(self.client.get('/api/journal/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bulk_check_ins_change_the_etag(self):
+        habit = Habits.objects.create(habit='Walk', user=self.user, description='d')
+        etag = self.client.get('/api/habit_tracking/')['ETag']
+        self.client.post('/api/habit_tracking/bulk/', {
+            'items': [{'habit_id': habit.pk, 'date': '2020-01-07', 'is_done': True}],
+        }, format='json')
+        self.assertEqual(self.client.get('/api/habit_tracking/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_profile_edits_change_the_etags_of_payloads_that_show_the_user(self):
+        VisionBoard.objects.create(user=self.user, content='Run', category=VisionBoardCategory.GOAL)
+        TestSession.objects.create(user=self.user, score=1)
+        Habits.objects.create(habit='Walk', user=self.user, description='d')
+        urls = ('/api/vision-board/', '/api/journal/', '/api/test_sessions/', '/api/habits/', '/api/habit_tracking/')
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        response = self.client.patch(
+            f'/api/auth/users/{self.user.pk}/', {'first_name': 'Renamed', 'username': 'renamed'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 200)
+        self.assertEqual(self.client.get('/api/vision-board/').json()['results'][0]['user']['first_name'], 'Renamed')
+        self.assertEqual(self.client.get('/api/journal/').json()['results'][0]['user'], 'renamed')
+
+    def test_a_write_in_another_worker_is_seen_by_this_one(self):
+        etag = self.client.get('/api/journal/')['ETag']
+        mood_url = '/api/journal/moods/?start=2000-01-01&end=2100-01-01'
+        self.assertEqual(self.client.get(mood_url).json()['totals']['Sad'], 0)
+        other_worker = {**settings.CACHES, 'default': {**settings.CACHES['default'], 'LOCATION': 'other-worker'}}
+        with override_settings(CACHES=other_worker), self.captureOnCommitCallbacks(execute=True):
+            JournalEntry.objects.create(user=self.user, content='Second entry', mood='Sad')
+        self.assertEqual(self.client.get('/api/journal/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(mood_url).json()['totals']['Sad'], 1)
+
+    def test_catalog_etag_follows_the_catalog_version(self):
+        etag = self.client.get('/api/books/')['ETag']
+        self.assertEqual(self.client.get('/api/books/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get('/api/books/?fields=title')['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'New title'
+            self.book.save()
+        self.assertEqual(self.client.get('/api/books/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FastJSONTests(SimpleTestCase):
+
+    def test_renders_like_the_stdlib_renderer(self):
+        data = {
+            'rate': Decimal('49.50'),
+            'label': gettext_lazy('Monday'),
+            'at': datetime.datetime(2030, 1, 7, 9, 30, tzinfo=datetime.timezone.utc),
+            'on': datetime.date(2030, 1, 7),
+            'text': 'line\u2028separator, caf\u00e9',
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'"2030-01-07T09:30:00Z"', renderers.FastJSONRenderer().render(data))
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b'')
+
+    def test_falls_back_to_the_stdlib(self):
+        data = {'big': 2 ** 70, 'nested': [1, 2]}
+        self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = renderers.FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(data), JSONRenderer().render(data))
+            self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(b'{"a": [1]}')), {'a': [1]})
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"mood": "caf\u00e9"}'.encode())), {'mood': 'caf\u00e9'})
+        latin = parser.parse(io.BytesIO('{"a": "caf\u00e9"}'.encode('latin-1')), None, {'encoding': 'latin-1'})
+        self.assertEqual(latin, {'a': 'caf\u00e9'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"a": '))
+
+
+class FastListTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('fast', 'fast@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        hub = KnowledgeHub.objects.create(content='hub', image_url='https://example.com/h.png',
+                                          title=KnowledgeHubCategory.SELF_AWARENESS)
+        Article.objects.create(title='Calm', summary='s', content='c', image_url='https://example.com/a.png',
+                               tags='calm', knowledgehub=hub)
+        Article.objects.create(title='Caf\u00e9', summary='s', content='c', image_url='https://example.com/b.png')
+        shared = Habits.objects.create(habit='Drink water', description='d')
+        own = Habits.objects.create(habit='Walk', description='d', user=self.user)
+        for day in range(1, 4):
+            HabitTracking.objects.create(habit=shared, user=self.user, date=datetime.date(2030, 1, day), is_done=True)
+            HabitTracking.objects.create(habit=own, user=self.user, date=datetime.date(2030, 1, day))
+        for mood in ('Happy', 'Sad', 'Stressed'):
+            JournalEntry.objects.create(user=self.user, mood=mood, content=f'Feeling {mood.lower()}')
+
+    def get(self, url):
+        for cache in caches.all():
+            cache.clear()
+        return self.client.get(url)
+
+    def assertSameAsSerializer(self, url):
+        fast = self.get(url)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast.json()
+
+    def test_parity(self):
+        for url in (
+            '/api/journal/', '/api/journal/?page_size=2', '/api/habit_tracking/', '/api/habit_tracking/?search=2030-01-02',
+            '/api/articles/', '/api/articles/?fields=id,knowledgehub', '/api/articles/?tag=calm',
+        ):
+            with self.subTest(url=url):
+                self.assertSameAsSerializer(url)
+        page = self.assertSameAsSerializer('/api/habit_tracking/?page_size=4')
+        self.assertSameAsSerializer(page['next'])
+
+    def test_search_results_keep_their_snippets(self):
+        rows = self.get('/api/articles/?search=calm').json()['results']
+        self.assertIn('snippet', rows[0])
+
+    def test_unmirrored_fields_are_refused(self):
+        class Unmirrored(serializers.ModelSerializer):
+            mood_label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = JournalEntry
+                fields = ['id', 'mood_label']
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(Unmirrored)
+
+
+class IndexUsageTests(IndexUsageTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('planner', 'planner@example.com', 'pass')
+        self.day = datetime.date(2030, 1, 7)
+
+    def assertListIndexed(self, viewset, params=None):
+        queryset = self.viewset_queryset(viewset, self.user, params)
+        # Pages are read in the viewset's keyset ordering
+        self.assertIndexed(queryset.order_by(*viewset.ordering))
+
+    def test_list_queries(self):
+        self.assertListIndexed(HabitTrackingViewSet)
+        self.assertListIndexed(HabitTrackingViewSet, {'search': '2030-01-07'})
+        self.assertListIndexed(JournalEntryViewSet)
+        self.assertListIndexed(JournalEntryViewSet, {'search': '2030-01-07'})
+        self.assertListIndexed(TestSessionViewSet)
+        self.assertListIndexed(VisionBoardViewSet)
+
+    def test_day_lookups(self):
+        self.assertIndexed(TestSession.objects.filter(user=self.user, session_date=self.day))
+        self.assertIndexed(JournalEntry.objects.filter(user=self.user, date__gte=self.day, date__lte=self.day))
+        self.assertIndexed(HabitTracking.objects.filter(
+            user=self.user, is_done=True, date__gte=self.day, date__lte=self.day,
+        ))
+
+
+class DailyTestSessionTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('taker', 'taker@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.questions = DiscoveryQuestion.objects.bulk_create([DiscoveryQuestion(text=f'q{i}') for i in range(3)])
+
+    def submit(self, option):
+        return self.client.post('/api/user_responses_api/', {
+            'responses': [{'question_id': question.pk, 'selected_option': option} for question in self.questions],
+        }, format='json')
+
+    def test_starting_twice_returns_the_same_session(self):
+        first = self.client.post('/api/test_sessions/', {})
+        second = self.client.post('/api/test_sessions/', {})
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json()['id'], second.json()['id'])
+        self.assertEqual(TestSession.objects.get().session_date, timezone.localdate())
+
+    def test_double_submission_is_stored_once(self):
+        first = self.submit(4)
+        second = self.submit(0)
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(second.json()['test_session']['id'], first.json()['test_session']['id'])
+        self.assertEqual(second.json()['score'], first.json()['score'])
+        self.assertEqual(QuestionaireUserResponse.objects.count(), len(self.questions))
+
+    def test_submission_fills_a_session_started_empty(self):
+        started = self.client.post('/api/test_sessions/', {}).json()
+        submitted = self.submit(4).json()
+        self.assertEqual(submitted['test_session']['id'], started['id'])
+        self.assertEqual(TestSession.objects.get().score, submitted['score'])
+
+    def test_backfill_keeps_the_first_session_of_a_day(self):
+        migration = importlib.import_module('prajnayana_dashboard.migrations.0024_testsession_session_date')
+        early, late, next_day = TestSession.objects.bulk_create([
+            TestSession(user=self.user, session_date=None) for _ in range(3)
+        ])
+        base = timezone.make_aware(datetime.datetime(2030, 1, 7, 9))
+        for session, taken in ((early, base), (late, base + datetime.timedelta(hours=3)),
+                               (next_day, base + datetime.timedelta(days=1))):
+            TestSession.objects.filter(pk=session.pk).update(date_taken=taken)
+        migration.backfill_session_dates(apps, None)
+        dates = dict(TestSession.objects.values_list('pk', 'session_date'))
+        self.assertEqual(dates, {
+            early.pk: datetime.date(2030, 1, 7), late.pk: None, next_day.pk: datetime.date(2030, 1, 8),
+        })
+
+
+class ConcurrentTestSessionTests(TransactionTestCase):
+
+    def test_concurrent_starts_share_one_session(self):
+        user = User.objects.create_user('racer', 'racer@example.com', 'pass')
+        barrier = threading.Barrier(8)
+        results, errors = [], []
+
+        def start():
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        results.append(TestSession.get_or_create_today(user))
+                        break
+                    except OperationalError as e:
+                        # SQLite's shared-cache test database fails on lock
+                        # contention instead of waiting; that is not a race
+                        if 'locked' not in str(e):
+                            raise
+                        time.sleep(0.01)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=start) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 8)
+        self.assertEqual(TestSession.objects.filter(user=user).count(), 1)
+        self.assertEqual({session.pk for session, _ in results}, {TestSession.objects.get().pk})
+        self.assertEqual(sum(created for _, created in results), 1)
+
+
+class DashboardHomeTests(APITestCase):
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user('home', 'home@example.com', 'pass')
+        self.client.force_authenticate(self.user)
+        self.today = timezone.localdate()
+        walk = Habits.objects.create(habit='Walk', user=self.user, description='d')
+        Habits.objects.create(habit='Read', description='d')
+        HabitTracking.objects.create(user=self.user, habit=walk, date=self.today, is_done=True)
+        self.entry = JournalEntry.objects.create(user=self.user, content='Entry', mood='Happy')
+        TestSession.objects.create(user=self.user, score=42)
+        VisionBoard.objects.create(user=self.user, content='Run a marathon', category=VisionBoardCategory.GOAL, favorite=True)
+        VisionBoard.objects.create(user=self.user, content='Not a favorite', category=VisionBoardCategory.GOAL)
+        coach = Coach.objects.create(user=User.objects.create_user('coach', 'coach@example.com', 'pass'),
+                                     bio='b', specialization='Sleep', hourly_rate=Decimal('50'),
+                                     available_days='Monday')
+        self.reservation = Reservation.objects.create(
+            user=self.user, coach=coach, date=self.today + datetime.timedelta(days=2), time_slot='9-10',
+        )
+        Reservation.objects.create(user=self.user, coach=coach, date=self.today + datetime.timedelta(days=1),
+                                   time_slot='9-10', status='canceled')
+
+    def get(self):
+        response = self.client.get('/api/dashboard/home/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_sections(self):
+        data = self.get().json()
+        self.assertEqual(data['date'], self.today.isoformat())
+        self.assertEqual((data['habits']['done'], data['habits']['total']), (1, 2))
+        self.assertEqual(data['mood']['mood'], 'Happy')
+        self.assertEqual(data['last_assessment']['score'], 42)
+        self.assertEqual([item['content'] for item in data['vision_board']], ['Run a marathon'])
+        self.assertEqual(data['next_reservation']['id'], self.reservation.pk)
+
+    def test_one_query_per_section_then_none(self):
+        with self.assertNumQueries(5):
+            first = self.get()
+        self.assertEqual(first['X-Dashboard-Rebuilt'], 'habits,mood,last_assessment,vision_board,next_reservation')
+        with self.assertNumQueries(0):
+            second = self.get()
+        self.assertEqual(second['X-Dashboard-Rebuilt'], '')
+        self.assertEqual(first.json(), second.json())
+
+    def test_an_edit_rebuilds_only_its_section(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.entry.mood = 'Calm'
+            self.entry.save()
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertEqual(response['X-Dashboard-Rebuilt'], 'mood')
+        self.assertEqual(response.json()['mood']['mood'], 'Calm')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.status = 'canceled'
+            self.reservation.save()
+        response = self.get()
+        self.assertEqual(response['X-Dashboard-Rebuilt'], 'next_reservation')
+        self.assertIsNone(response.json()['next_reservation'])
+
+    def test_user_edits_rebuild_the_reservation(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservation.coach.user.first_name = 'Coach'
+            self.reservation.coach.user.save()
+        response = self.get()
+        self.assertEqual(response['X-Dashboard-Rebuilt'], 'next_reservation')
+        self.assertEqual(response.json()['next_reservation']['coach_details']['user_details']['first_name'], 'Coach')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Home'
+            self.user.username = 'renamed'
+            self.user.save()
+        response = self.get()
+        self.assertEqual(response['X-Dashboard-Rebuilt'], 'last_assessment,next_reservation')
+        self.assertEqual(response.json()['next_reservation']['user_details']['first_name'], 'Home')
+        self.assertEqual(response.json()['last_assessment']['user'], 'renamed')
+
+    def test_next_reservation_follows_the_clock(self):
+        coach = self.reservation.coach
+        for slot in ('9-10', '11-12', '1-2'):
+            Reservation.objects.create(user=self.user, coach=coach, date=self.today, time_slot=slot)
+
+        def next_slot_at(hour, minute=0):
+            now = timezone.make_aware(datetime.datetime.combine(self.today, datetime.time(hour, minute)))
+            with mock.patch('django.utils.timezone.now', return_value=now):
+                reservation = self.get().json()['next_reservation']
+            return reservation['date'], reservation['time_slot']
+
+        today = self.today.isoformat()
+        self.assertEqual(next_slot_at(8), (today, '9-10'))
+        self.assertEqual(next_slot_at(10, 30), (today, '11-12'))
+        self.assertEqual(next_slot_at(12), (today, '1-2'))
+        self.assertEqual(next_slot_at(14), (self.reservation.date.isoformat(), '9-10'))
+
+    def test_empty_sections_are_cached_too(self):
+        self.client.force_authenticate(User.objects.create_user('new', 'new@example.com', 'pass'))
+        data = self.get().json()
+        self.assertEqual((data['habits']['done'], data['habits']['total']), (0, 1))
+        self.assertIsNone(data['mood'])
+        self.assertIsNone(data['last_assessment'])
+        self.assertEqual(data['vision_board'], [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().json(), data)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/dashboard/home/').status_code, 401)
+
+
+class DeploymentCheckTests(SimpleTestCase):
+
+    def shared(self, *aliases):
+        store = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.gettempdir()}
+        return {**settings.CACHES, **{alias: store for alias in aliases}}
+
+    def test_per_process_caches_with_several_workers(self):
+        with override_settings(WEB_CONCURRENCY=1):
+            self.assertEqual(checks.check_shared_caches(None), [])
+        with override_settings(WEB_CONCURRENCY=4):
+            self.assertEqual(
+                [message.id for message in checks.check_shared_caches(None)], ['backend.E001', 'backend.W001'],
+            )
+        with override_settings(WEB_CONCURRENCY=4, CACHES=self.shared(settings.VERSION_CACHE_ALIAS)):
+            self.assertEqual([message.id for message in checks.check_shared_caches(None)], ['backend.W001'])
+        shared = self.shared(settings.VERSION_CACHE_ALIAS, settings.LLM_CACHE_ALIAS)
+        with override_settings(WEB_CONCURRENCY=4, CACHES=shared):
+            self.assertEqual(checks.check_shared_caches(None), [])
+
+    def test_several_workers_default_to_a_shared_version_store(self):
+        module = importlib.import_module('backend.settings')
+        try:
+            with mock.patch.dict('os.environ', {'WEB_CONCURRENCY': '4'}):
+                importlib.reload(module)
+            self.assertEqual(
+                module.CACHES[module.VERSION_CACHE_ALIAS]['BACKEND'],
+                'django.core.cache.backends.filebased.FileBasedCache',
+            )
+        finally:
+            importlib.reload(module)
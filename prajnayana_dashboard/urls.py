@@ -11,6 +11,7 @@ router.register('habit_tracking', HabitTrackingViewSet, basename='habit_tracking
 router.register('journal', JournalEntryViewSet, basename='journal')
 router.register('knowledge-hub', KnowledgeHubViewSet, basename='knowledge_hub')
 router.register('articles', ArticleViewSet, basename='article')
+router.register('article-chats', ArticleChatSessionViewSet, basename='article_chat')
 router.register('vision-board', VisionBoardViewSet, basename='vision_board')
 router.register('books', BookRecommendationViewSet, basename='book_recommendation')
 
@@ -18,4 +19,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('user_responses_api/',generate_questionaire_score),
     path('llm-article-summary/', article_summary),
+    path('llm-article-summary/stream/', article_summary_stream),
+    path('llm-metrics/', llm_metrics),
+    path('catalog-metrics/', catalog_cache_metrics),
+    path('dashboard/home/', dashboard_home),
 ]
@@ -1,139 +1,577 @@
+import base64
+import csv
 import datetime
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+import io
+import json
+import zlib
+from rest_framework import mixins, viewsets
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from .models import *
 from .serializers import *
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q
-import openai
-from openai import OpenAI
+from django.db.models import Q, Case, When, Value, IntegerField, Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.conf import settings
 import os
+from . import llm, llm_gateway
+from .search import SearchHit, article_index, journal_index
+from . import chat, dashboard, streaks
+from .insights import is_current as insight_is_current
+from backend.catalog_cache import CatalogCacheMixin, catalog_metrics, catalog_version
+from backend.conditional import ConditionalGetMixin
+from backend.fastpath import FastListMixin
+from backend.fieldsets import ListFieldsetMixin
+from backend.pagination import KeysetPagination
+from backend.versioning import get_version
 
 
 
-class DiscoveryQuestionViewSet(viewsets.ModelViewSet):
+class DiscoveryQuestionViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = DiscoveryQuestion.objects.all()
     serializer_class = DiscoveryQuestionSerializer
     permission_classes = [IsAuthenticated] 
+    pagination_class = KeysetPagination
+    ordering = ('id',)
+    page_size = 100
+    max_page_size = 200
 
-class TestSessionViewSet(viewsets.ModelViewSet):
+class TestSessionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TestSessionSerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'assessment'
+    etag_user_scoped = True
+    etag_embeds_user = True
+    pagination_class = KeysetPagination
+    ordering = ('-date_taken', '-id')
 
     def get_queryset(self):
-        return TestSession.objects.filter(user=self.request.user)
+        return TestSession.objects.filter(user=self.request.user).select_related('user')
     
 
-    def perform_create(self, serializer):
-        test_session_exist = TestSession.objects.filter(
-            user=self.request.user,
-            date_taken__date=timezone.now().date() 
-        ).exists()
-
-        if test_session_exist:
-            raise ValidationError("You already have a test session for today.")  # Raise error if a session exists
-        
-        # Save the TestSession with the user
-        serializer.save(user=self.request.user) 
+    def create(self, request, *args, **kwargs):
+        """Start today's session, or return it (200) if it already exists."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        test_session, created = TestSession.get_or_create_today(request.user, **serializer.validated_data)
+        return Response(
+            self.get_serializer(test_session).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
-class QuestionaireUserResponseViewSet(viewsets.ModelViewSet):
+class QuestionaireUserResponseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = QuestionaireUserResponseSerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'assessment'
+    etag_user_scoped = True
+    pagination_class = KeysetPagination
+    ordering = ('id',)
+    page_size = 100
+    max_page_size = 200
 
     def perform_create(self, serializer):
         test_session_id = self.request.data.get('test_session')
         test_session = TestSession.objects.get(id=test_session_id)
         serializer.save(test_session=test_session)
 
+    def get_etag_version(self):
+        # Responses embed their questions, which are catalog data
+        return f"{super().get_etag_version()}.{catalog_version()}"
+
     def get_queryset(self):
-        return QuestionaireUserResponse.objects.filter(test_session__user=self.request.user)
+        return QuestionaireUserResponse.objects.filter(
+            test_session__user=self.request.user
+        ).select_related('question')
     
 
-class HabitsViewSet(viewsets.ModelViewSet):
+class HabitsViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = HabitsSerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'habits'
+    etag_user_scoped = True
+    etag_embeds_user = True
+    pagination_class = KeysetPagination
+    ordering = ('id',)
+    page_size = 50
 
     def get_queryset(self):
-        return Habits.objects.filter(Q(user=self.request.user) | Q(user__isnull=True)).distinct()
+        return Habits.objects.filter(
+            Q(user=self.request.user) | Q(user__isnull=True)
+        ).select_related('user').distinct()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     
-class HabitTrackingViewSet(viewsets.ModelViewSet):
+class HabitTrackingViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = HabitTrackingSerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'habits'
+    etag_user_scoped = True
+    etag_embeds_user = True
+    pagination_class = KeysetPagination
+    ordering = ('-date', 'id')
+    page_size = 50
 
     def get_queryset(self):
         # filter by date
+        queryset = HabitTracking.objects.filter(user=self.request.user).select_related('user', 'habit__user')
         search = self.request.GET.get('search', None)
         if search:
             search = datetime.datetime.strptime(search, '%Y-%m-%d').date()
-            return HabitTracking.objects.filter(user=self.request.user,date=search)
+            return queryset.filter(date=search)
         
-        return HabitTracking.objects.filter(user=self.request.user)
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Check in many habits and days in one request: {"items": [{habit_id, date, is_done}, ...]}"""
+        serializer = HabitTrackingBulkSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        items = serializer.save()
+
+        keys = {(item['habit_id'], item['date']) for item in items}
+        tracked = self.get_queryset().filter(
+            habit_id__in={habit_id for habit_id, _ in keys},
+            date__in={date for _, date in keys},
+        ).order_by('date', 'habit_id')
+        tracked = [row for row in tracked if (row.habit_id, row.date) in keys]
+        return Response(HabitTrackingSerializer(tracked, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Current/longest streak and 7/30 day completion rates for each tracked habit."""
+        return Response(HabitStreakSerializer(streaks.streaks_for_user(request.user), many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """
+        A year of done days per habit as a bitset: bit i (least significant bit
+        first within each byte) is day i of the year, 0 being January 1st.
+        """
+        try:
+            year = int(request.query_params.get('year', timezone.localdate().year))
+            first_day = datetime.date(year, 1, 1)
+        except (ValueError, OverflowError):
+            return Response({"detail": "Invalid year."}, status=status.HTTP_400_BAD_REQUEST)
+        last_day = datetime.date(year, 12, 31)
+        days = (last_day - first_day).days + 1
+
+        masks = {}
+        names = {}
+        done_days = HabitTracking.objects.filter(
+            user=request.user, is_done=True, date__gte=first_day, date__lte=last_day,
+        ).order_by('habit_id', 'date').values_list('habit_id', 'habit__habit', 'date')
+        for habit_id, name, date in done_days:
+            if habit_id not in masks:
+                masks[habit_id] = bytearray((days + 7) // 8)
+                names[habit_id] = name
+            day = (date - first_day).days
+            masks[habit_id][day // 8] |= 1 << (day % 8)
 
-class JournalEntryViewSet(viewsets.ModelViewSet):
+        return Response({
+            "year": year,
+            "days": days,
+            "encoding": "base64-bitset-lsb",
+            "habits": [
+                {
+                    "habit_id": habit_id,
+                    "habit": names[habit_id],
+                    "done_days": sum(bin(byte).count("1") for byte in mask),
+                    "mask": base64.b64encode(bytes(mask)).decode("ascii"),
+                }
+                for habit_id, mask in masks.items()
+            ],
+        })
+
+class JournalEntryViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = JournalEntrySerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'journal'
+    etag_user_scoped = True
+    etag_embeds_user = True
+    pagination_class = KeysetPagination
+    ordering = ('-timestamp', 'id')
+    mood_buckets = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+    mood_cache_timeout = 60 * 60
+    search_max_limit = 50
+    search_max_offset = 1000
+    export_fields = ('id', 'date', 'timestamp', 'mood', 'content')
+    export_chunk_size = 2000
 
     def get_queryset(self):
         # filter by date
+        queryset = JournalEntry.objects.filter(user=self.request.user).select_related('user')
         search = self.request.GET.get('search', None)
         if search:
             search = datetime.datetime.strptime(search, '%Y-%m-%d').date()
-            return JournalEntry.objects.filter(user=self.request.user,date=search).order_by("-timestamp")
-        return JournalEntry.objects.filter(user=self.request.user).order_by("-timestamp")
+            return queryset.filter(date=search).order_by("-timestamp")
+        return queryset.order_by("-timestamp")
     
-class KnowledgeHubViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def moods(self, request):
+        """
+        Mood counts between ?start= and ?end= (YYYY-MM-DD, default the last
+        30 days) bucketed by ?bucket=day|week|month.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in self.mood_buckets:
+            return Response({"detail": "bucket must be day, week or month."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = datetime.datetime.strptime(request.query_params['end'], '%Y-%m-%d').date() \
+                if 'end' in request.query_params else timezone.localdate()
+            start = datetime.datetime.strptime(request.query_params['start'], '%Y-%m-%d').date() \
+                if 'start' in request.query_params else end - datetime.timedelta(days=29)
+        except ValueError:
+            return Response({"detail": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"detail": "start must not be after end."}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = f"journal-moods:{request.user.id}:{get_version('journal', request.user.id)}:{start}:{end}:{bucket}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._mood_report(request.user, start, end, bucket)
+            cache.set(cache_key, data, self.mood_cache_timeout)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Keyword search over the user's own entries: ?q=, ?limit=, ?offset=."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.search_max_limit)
+            offset = min(int(request.query_params.get('offset', 0)), self.search_max_offset)
+        except ValueError:
+            return Response({"detail": "limit and offset must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or offset < 0:
+            return Response({"detail": "limit and offset must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One extra hit tells us whether there is a next page
+        hits = journal_index.search(query, scope=request.user.id, limit=limit + 1, offset=offset)
+        if hits is None:
+            entries = JournalEntry.objects.filter(user=request.user, content__icontains=query) \
+                .order_by('-timestamp', '-id')[offset:offset + limit + 1]
+            hits = [SearchHit(entry.pk, None, None) for entry in entries]
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+
+        entries = JournalEntry.objects.filter(user=request.user, pk__in=[hit.pk for hit in hits]) \
+            .only('id', 'date', 'timestamp', 'mood').in_bulk()
+        results = [
+            {
+                "id": hit.pk,
+                "date": entries[hit.pk].date,
+                "timestamp": entries[hit.pk].timestamp,
+                "mood": entries[hit.pk].mood,
+                "rank": hit.rank,
+                "snippet": hit.snippet,
+            }
+            for hit in hits if hit.pk in entries
+        ]
+        return Response({
+            "results": results,
+            "next_offset": offset + limit if has_more else None,
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the whole journal as ?export_format=ndjson|csv, optionally
+        gzipped (?gzip=1) and limited to ?start= / ?end= (YYYY-MM-DD).
+        """
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in ('ndjson', 'csv'):
+            return Response({"detail": "export_format must be ndjson or csv."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = JournalEntry.objects.filter(user=request.user)
+        try:
+            if 'start' in request.query_params:
+                queryset = queryset.filter(
+                    date__gte=datetime.datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+                )
+            if 'end' in request.query_params:
+                queryset = queryset.filter(
+                    date__lte=datetime.datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+                )
+        except ValueError:
+            return Response({"detail": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = queryset.order_by('timestamp', 'id').values(*self.export_fields).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        if export_format == 'csv':
+            content, content_type = self._export_csv(rows), 'text/csv'
+        else:
+            content, content_type = self._export_ndjson(rows), 'application/x-ndjson'
+        content = self._buffered(content)
+
+        filename = f"journal-{timezone.localdate():%Y%m%d}.{export_format}"
+        if request.query_params.get('gzip') in ('1', 'true'):
+            content, content_type, filename = self._gzipped(content), 'application/gzip', f"{filename}.gz"
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def _export_ndjson(self, rows):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def _export_csv(self, rows):
+        line = io.StringIO()
+        writer = csv.writer(line)
+        writer.writerow(self.export_fields)
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+                for value in row.values()
+            ])
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+        yield line.getvalue()
+
+    def _buffered(self, chunks, size=64 * 1024):
+        """Join small text chunks into ~64KB byte blocks before they hit the socket."""
+        buffer, length = [], 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            length += len(chunk)
+            if length >= size:
+                yield ''.join(buffer).encode('utf-8')
+                buffer, length = [], 0
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+
+    def _gzipped(self, blocks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for block in blocks:
+            compressed = compressor.compress(block)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def _mood_report(self, user, start, end, bucket):
+        rows = (
+            JournalEntry.objects.filter(user=user, date__gte=start, date__lte=end)
+            .annotate(period=self.mood_buckets[bucket]('date'))
+            .values('period', 'mood')
+            .annotate(count=Count('id'))
+            .order_by('period', 'mood')
+        )
+        moods = [mood for mood, _ in JournalEntry.MOOD_CHOICES]
+        totals = dict.fromkeys(moods, 0)
+        buckets = {}
+        for row in rows:
+            counts = buckets.setdefault(row['period'], dict.fromkeys(moods, 0))
+            counts[row['mood']] = counts.get(row['mood'], 0) + row['count']
+            totals[row['mood']] = totals.get(row['mood'], 0) + row['count']
+
+        return {
+            "start": start,
+            "end": end,
+            "bucket": bucket,
+            "totals": totals,
+            "buckets": [
+                {
+                    "period": period,
+                    "counts": counts,
+                    "total": sum(counts.values()),
+                    "dominant": max(counts, key=counts.get),
+                }
+                for period, counts in buckets.items()
+            ],
+        }
+
+class KnowledgeHubViewSet(ConditionalGetMixin, CatalogCacheMixin, ListFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = KnowledgeHubSerializer
+    list_serializer_class = KnowledgeHubListSerializer
+    list_only_fields = ('title', 'level', 'image_url', 'date_added')
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('id',)
 
     def get_queryset(self):
         search = self.request.GET.get('search', None)
         if search:
-            return KnowledgeHub.objects.filter(title__icontains=search)
-        return KnowledgeHub.objects.filter()
+            return self.slim_queryset(KnowledgeHub.objects.filter(title__icontains=search))
+        return self.slim_queryset(KnowledgeHub.objects.filter())
     
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ConditionalGetMixin, CatalogCacheMixin, FastListMixin, ListFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = ArticleSerializer
+    list_serializer_class = ArticleListSerializer
+    list_only_fields = ('title', 'summary', 'level', 'image_url', 'tags', 'knowledgehub')
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    search_limit = 50
+    search_snippets = None
+    facet_cache_timeout = 60 * 60
+
+    @property
+    def ordering(self):
+        # Search results page through their relevance order
+        if self.search_snippets is not None:
+            return ('search_position', 'id')
+        return ('id',)
 
     def get_queryset(self):
+        return self.slim_queryset(self.filter_tags(self.get_base_queryset()))
+
+    def use_fast_list(self):
+        # Search results carry snippets, which only the serializer adds
+        return super().use_fast_list() and self.search_snippets is None
+
+    def filter_tags(self, queryset):
+        """``?tag=a&tag=b`` keeps articles with all of the tags, or any of them with ``tag_mode=any``."""
+        names = Tag.parse(",".join(self.request.GET.getlist('tag')))
+        if not names:
+            return queryset
+        mode = self.request.GET.get('tag_mode', 'all')
+        if mode not in ('all', 'any'):
+            raise ValidationError({"tag_mode": "Use 'all' or 'any'."})
+        links = Article.normalized_tags.through.objects.filter(tag__name__in=names)
+        if mode == 'all' and len(names) > 1:
+            links = links.values('article_id').annotate(matched=Count('tag_id')).filter(matched=len(names))
+        return queryset.filter(pk__in=links.values('article_id'))
+
+    def get_base_queryset(self):
         request = self.request
         search_query = request.GET.get('search', '')
         category_query = request.GET.get('k_id', '')
 
         if search_query:
-            return Article.objects.filter(
-                Q(title__icontains=search_query) |
-                Q(summary__icontains=search_query) |
-                Q(content__icontains=search_query) |
-                Q(tags__icontains=search_query)
-            ).distinct()
+            hits = article_index.search(search_query, limit=self.search_limit)
+            if hits is None:
+                # No full-text index on this database, scan the columns instead.
+                return Article.objects.filter(
+                    Q(title__icontains=search_query) |
+                    Q(summary__icontains=search_query) |
+                    Q(content__icontains=search_query) |
+                    Q(tags__icontains=search_query)
+                ).select_related('knowledgehub').distinct()
+            self.search_snippets = {hit.pk: hit.snippet for hit in hits}
+            if not hits:
+                # Still annotated, the keyset ordering pages by search_position
+                return Article.objects.none().annotate(search_position=Value(0, output_field=IntegerField()))
+            rank_order = Case(
+                *[When(pk=hit.pk, then=Value(position)) for position, hit in enumerate(hits)],
+                output_field=IntegerField(),
+            )
+            return Article.objects.filter(pk__in=self.search_snippets).select_related('knowledgehub').annotate(
+                search_position=rank_order
+            ).order_by('search_position')
 
         if category_query:
-            return Article.objects.filter(knowledgehub__id=category_query)
-        return Article.objects.all()
+            return Article.objects.filter(knowledgehub__id=category_query).select_related('knowledgehub')
+        return Article.objects.select_related('knowledgehub')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.search_snippets is not None:
+            context['search_snippets'] = self.search_snippets
+        return context
+
+    @action(detail=False)
+    def facets(self, request):
+        """Article count per tag, optionally within one knowledge hub (``?k_id=``)."""
+        hub = request.GET.get('k_id', '')
+        if hub and not hub.isdigit():
+            raise ValidationError({"k_id": "Must be a knowledge hub id."})
+        cache_key = f"article-tag-facets:{get_version('article_tags')}:{hub}"
+        data = cache.get(cache_key)
+        if data is None:
+            links = Article.normalized_tags.through.objects.all()
+            if hub:
+                links = links.filter(article__knowledgehub_id=hub)
+            data = [
+                {"tag": row['tag__name'], "count": row['count']}
+                for row in links.values('tag__name').annotate(count=Count('article_id')).order_by('-count', 'tag__name')
+            ]
+            cache.set(cache_key, data, self.facet_cache_timeout)
+        return Response(data)
+
+    @action(detail=True)
+    def insights(self, request, pk=None):
+        """Precomputed summary, key terms and reflective questions, never generated on request."""
+        article = self.get_object()
+        insight = ArticleInsight.objects.filter(article=article).first()
+        if insight is None or insight.status == ArticleInsightStatus.FAILED:
+            return Response({"status": "pending"}, status=status.HTTP_404_NOT_FOUND)
+        data = ArticleInsightSerializer(insight).data
+        # Older insights are still better than none while a refresh is pending
+        data['stale'] = not insight_is_current(insight, article)
+        return Response(data)
     
 
-class VisionBoardViewSet(viewsets.ModelViewSet):
+class ArticleChatSessionViewSet(ConditionalGetMixin,
+                                mixins.CreateModelMixin,
+                                mixins.ListModelMixin,
+                                mixins.RetrieveModelMixin,
+                                mixins.DestroyModelMixin,
+                                viewsets.GenericViewSet):
+    """
+    Conversations with the article assistant. Create one with ``{"article": id}``
+    then POST ``{"question": ...}`` to ``ask``; the article and history are
+    taken from the server, not the request.
+    """
+    permission_classes = [IsAuthenticated]
+    etag_namespace = 'article_chats'
+    etag_user_scoped = True
+    pagination_class = KeysetPagination
+    ordering = ('-id',)
+
+    def get_queryset(self):
+        return ArticleChatSession.objects.filter(user=self.request.user).select_related('article')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ArticleChatSessionSerializer
+        return ArticleChatSessionDetailSerializer
+
+    @action(detail=True, methods=['post'])
+    def ask(self, request, pk=None):
+        session = self.get_object()
+        serializer = ArticleChatQuestionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session, reply, cached = chat.ask(session, serializer.validated_data['question'])
+        except llm_gateway.Unavailable as e:
+            return _unavailable(e)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response({
+            "reply": reply,
+            "cached": cached,
+            "message_count": len(session.messages),
+        })
+
+
+class VisionBoardViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = VisionBoardSerializer
     permission_classes = [IsAuthenticated]
+    etag_namespace = 'vision_board'
+    etag_user_scoped = True
+    etag_embeds_user = True
+    pagination_class = KeysetPagination
+    ordering = ('id',)
 
     def get_queryset(self):
-        return VisionBoard.objects.filter(user=self.request.user)
+        return VisionBoard.objects.filter(user=self.request.user).select_related('user')
     
 
 # Book ViewSet
-class BookRecommendationViewSet(viewsets.ModelViewSet):
+class BookRecommendationViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     serializer_class = BookRecommendationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ('id',)
 
     def get_queryset(self):
         search = self.request.GET.get('search', None)
@@ -144,20 +582,29 @@ class BookRecommendationViewSet(viewsets.ModelViewSet):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_questionaire_score(request):
-    user = request.user
-    print(request.data)
-    time_taken = timezone.datetime
-    test_session = TestSession.objects.create(user=user,date_taken=time_taken,score=0)
-    user_responses=[]
-    for res in request.data['responses']:
-        # question=DiscoveryQuestion.objects.
-        user_responses.append(QuestionaireUserResponse(test_session=test_session,question_id=res['question_id'],selected_option=res['selected_option']))
-        test_session.score+=res['selected_option']+1
-    test_session.save()
-    #bulk create user responses
-    QuestionaireUserResponse.objects.bulk_create(user_responses)
-    print("UserResponses Created",test_session,user_responses)
-    return Response({"message": "Questionaire score generated successfully"}, status=status.HTTP_201_CREATED)
+    serializer = QuestionaireSubmissionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    test_session = serializer.save(user=request.user)
+    if not serializer.submitted:
+        # Today's questionnaire was already submitted, e.g. a double tap
+        return Response({
+            "message": "Questionaire already submitted today",
+            "score": test_session.score,
+            "test_session": TestSessionSerializer(test_session).data,
+        }, status=status.HTTP_200_OK)
+    return Response({
+        "message": "Questionaire score generated successfully",
+        "score": test_session.score,
+        "test_session": TestSessionSerializer(test_session).data,
+    }, status=status.HTTP_201_CREATED)
+
+
+def _unavailable(error):
+    return Response(
+        {"error": str(error)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(error.retry_after)},
+    )
 
 
 @api_view(['POST'])
@@ -173,35 +620,90 @@ def article_summary(request):
 
     article_content = article_message.get("content", "")
 
-    # Inject article-aware system prompt
-    system_prompt = {
-        "role": "system",
-        "content": (
-            f"The following is the article content:\n\n{article_content}\n\n"
-            "You are a helpful assistant that answers questions based only on the content of the provided article. "
-            "You need to explain or define terms mentioned in the article if the explanation helps understand the article better. "
-            "Do not answer unrelated questions (e.g., math, general advice). "
-            "If the user asks something not relevant to the article, respond with: "
-            "'I'm only able to answer questions based on the article content.'"
-        )
-    }
-
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  
-            messages=[system_prompt] + messages[1:]
-        )
-
-        assistant_message = response.choices[0].message.content.strip()
+        assistant_message, cached = llm.complete_chat(article_content, messages[1:])
         messages.append({"role": "assistant", "content": assistant_message})
 
         return Response({
             "reply": assistant_message,
             "messages": messages,
+            "cached": cached,
             "status": status.HTTP_200_OK
         })
 
+    except llm_gateway.Unavailable as e:
+        return _unavailable(e)
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def article_summary_stream(request):
+    """
+    Streaming variant of article_summary. Takes the same body and answers
+    with server-sent events: a "delta" event per piece of the reply, then a
+    "done" event holding the assembled reply and conversation, or "error".
+    Runs as an async view so an ASGI worker is not tied up while tokens arrive.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        messages = json.loads(request.body or b"{}").get("messages", [])
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST)
+    if not messages:
+        return JsonResponse({"error": "No messages provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+    article_message = messages[0]
+    if article_message.get("role") != "user":
+        return JsonResponse({"error": "First message must be from user and contain the article."}, status=status.HTTP_400_BAD_REQUEST)
+    article_content = article_message.get("content", "")
+
+    async def events():
+        parts = []
+        try:
+            async for delta in llm.stream_chat(article_content, messages[1:]):
+                parts.append(delta)
+                yield _server_sent_event("delta", {"content": delta})
+        except Exception as e:
+            yield _server_sent_event("error", {"error": str(e)})
+            return
+        reply = "".join(parts).strip()
+        yield _server_sent_event("done", {
+            "reply": reply,
+            "messages": messages + [{"role": "assistant", "content": reply}],
+        })
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the whole stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# csrf_exempt() would wrap the coroutine in a sync function on Django 4.2
+article_summary_stream.csrf_exempt = True
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def llm_metrics(request):
+    return Response({"cache": llm.cache_metrics(), "gateway": llm_gateway.get_gateway().metrics()})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def catalog_cache_metrics(request):
+    return Response(catalog_metrics())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_home(request):
+    data, rebuilt = dashboard.home(request.user)
+    response = Response(data)
+    response['X-Dashboard-Rebuilt'] = ','.join(rebuilt)
+    return response